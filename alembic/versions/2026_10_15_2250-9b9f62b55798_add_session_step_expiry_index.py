@@ -0,0 +1,54 @@
+"""Replace current_step index on user_sessions with composite (current_step, expires_at)
+
+Revision ID: 9b9f62b55798
+Revises: be1e95f6db4f
+Create Date: 2026-10-15 22:50:12.417305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b9f62b55798'
+down_revision: Union[str, None] = 'be1e95f6db4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Apply migration changes."""
+    # Built concurrently so the live sessions table is not write-locked
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_session_step_active',
+            'user_sessions',
+            ['current_step', 'expires_at'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        # current_step is the composite's leading column, so it serves
+        # step-only lookups and the single-column index is redundant
+        op.drop_index(
+            'idx_session_step',
+            table_name='user_sessions',
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Revert migration changes."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_session_step',
+            'user_sessions',
+            ['current_step'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'idx_session_step_active',
+            table_name='user_sessions',
+            postgresql_concurrently=True
+        )
@@ -328,13 +328,13 @@ async def confirm_parsed_grades(update: Update, context: ContextTypes.DEFAULT_TY
                             # Create course from curriculum data
                             course = Course(
                                 course_code=course_code,
-                                course_name=curriculum_course["course_name"],
-                                theoretical_credits=curriculum_course["theoretical_credits"],
-                                practical_credits=curriculum_course["practical_credits"],
-                                course_type=curriculum_course["course_type"],
-                                semester_recommended=curriculum_course.get("semester_recommended"),
+                                course_name=curriculum_course.course_name,
+                                theoretical_credits=curriculum_course.theoretical_credits,
+                                practical_credits=curriculum_course.practical_credits,
+                                course_type=curriculum_course.course_type,
+                                semester_recommended=curriculum_course.semester_recommended,
                                 entry_year=student_entry_year,
-                                is_mandatory=curriculum_course["is_mandatory"]
+                                is_mandatory=curriculum_course.is_mandatory
                             )
                         else:
                             # Fallback: create with default values but warn user
@@ -13,6 +13,7 @@ from loguru import logger
 from app.config import settings
 from app.services.bot import CourseWiseBot
 from app.core.database import init_db
+from app.utils.curriculum import load_all_curricula
 
 
 class CourseWiseApp:
@@ -64,6 +65,10 @@ class CourseWiseApp:
             await init_db()
             logger.info("Database initialization complete")
             
+            # Preload curricula so course lookups never touch the disk per request
+            loaded_curricula = load_all_curricula()
+            logger.info(f"Preloaded {loaded_curricula} curricula")
+            
             # Initialize bot
             logger.info("Initializing CourseWise bot...")
             self.bot = CourseWiseBot()
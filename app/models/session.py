@@ -62,7 +62,7 @@ class UserSession(Base):
     __table_args__ = (
         Index("idx_session_telegram_user", "telegram_user_id"),
         Index("idx_session_expires", "expires_at"), 
-        Index("idx_session_step", "current_step"),
+        Index("idx_session_step_active", "current_step", "expires_at"),
         Index("idx_session_active", "telegram_user_id", "expires_at"),
         CheckConstraint(
             "expires_at > created_at",
@@ -0,0 +1,5 @@
+"""
+Maintenance scripts for CourseWise.
+
+Run with ``python -m app.scripts.<name>`` from the project root.
+"""
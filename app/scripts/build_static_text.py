@@ -0,0 +1,31 @@
+"""
+Pre-render curriculum charts for the recommendation prompt.
+
+Writes a ``.txt`` sibling next to each curriculum JSON file containing the
+exact text SimpleRecommendationService would otherwise format on every
+request. Re-run whenever a curriculum file changes; stale text files are
+detected by mtime and ignored until rebuilt.
+
+Usage:
+    python -m app.scripts.build_static_text
+"""
+
+from pathlib import Path
+
+import orjson
+from loguru import logger
+
+from app.services.simple_recommendation import CURRICULUM_TEXT_PATHS, SimpleRecommendationService
+
+
+def build_static_text() -> None:
+    """Render every curriculum JSON file to its text sibling."""
+    for json_path, text_path in CURRICULUM_TEXT_PATHS.items():
+        curriculum = orjson.loads(Path(json_path).read_bytes())
+        text = SimpleRecommendationService._format_curriculum_for_llm(curriculum)
+        Path(text_path).write_text(text, encoding="utf-8")
+        logger.info(f"Wrote {text_path} ({len(text)} chars)")
+
+
+if __name__ == "__main__":
+    build_static_text()
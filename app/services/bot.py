@@ -22,6 +22,7 @@ class CourseWiseBot:
         """Initialize the CourseWise bot."""
         self.application: Optional[Application] = None
         self.is_running = False
+        self._stopped = asyncio.Event()
         
         logger.info("CourseWise bot initialized")
     
@@ -103,6 +104,7 @@ class CourseWiseBot:
             # Begin polling
             logger.info("Starting bot polling...")
             self.is_running = True
+            self._stopped.clear()
             await self.application.updater.start_polling(
                 allowed_updates=Update.ALL_TYPES,
                 drop_pending_updates=True
@@ -111,9 +113,8 @@ class CourseWiseBot:
             # Keep the application running
             logger.info("Bot is now running. Press Ctrl+C to stop.")
             
-            # Keep running until stopped
-            while self.is_running:
-                await asyncio.sleep(1)
+            # Park until stop() is called instead of waking up every second
+            await self._stopped.wait()
                 
         except Exception as e:
             logger.error(f"Error starting bot: {e}")
@@ -128,6 +129,7 @@ class CourseWiseBot:
         
         try:
             self.is_running = False
+            self._stopped.set()
             logger.info("Stopping bot...")
             
             # Stop polling
@@ -10,6 +10,7 @@ import json
 from pathlib import Path
 from datetime import datetime
 from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.student_analyzer import StudentAnalyzer, StudentAcademicStatus
 from app.services.academic_rules import AcademicRulesEngine
@@ -63,13 +64,14 @@ class ContextAssemblyService:
         self,
         student_id: int,
         target_semester: str,
-        user_preferences: Optional[Dict[str, Any]] = None
+        user_preferences: Optional[Dict[str, Any]] = None,
+        db: Optional[AsyncSession] = None
     ) -> Dict[str, Any]:
         """تجمیع کانتکست کامل برای LLM"""
         
         try:
             # 1. تجزیه وضعیت دانشجو
-            student_status = await self.student_analyzer.analyze_student_status(student_id)
+            student_status = await self.student_analyzer.analyze_student_status(student_id, db=db)
             
             # 2. بارگذاری چارت درسی مناسب
             self.curriculum_chart = self._load_curriculum_chart(student_status.entry_year)
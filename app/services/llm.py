@@ -7,9 +7,10 @@ specifically for grade text parsing and course recommendation functionality.
 
 import json
 import re
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Literal, Optional, Any, Tuple
 from dataclasses import dataclass
 from openai import AsyncOpenAI
+from pydantic import BaseModel, ConfigDict, Field
 from loguru import logger
 
 from app.config import settings
@@ -37,6 +38,56 @@ class GradeParseResult:
     error_message: Optional[str] = None
 
 
+class RecommendedCourseCredits(BaseModel):
+    """Credit split of a recommended course."""
+    model_config = ConfigDict(extra="forbid")
+
+    theoretical: int
+    practical: int
+
+
+class MappedGrade(BaseModel):
+    """A student-provided grade mapped onto a curriculum course."""
+    model_config = ConfigDict(extra="forbid")
+
+    course_code: str
+    course_name: str
+    grade: Optional[float]
+    status: Literal["قبول", "مردود"]
+
+
+class RecommendedCourse(BaseModel):
+    """A single course recommended by the LLM."""
+    model_config = ConfigDict(extra="forbid")
+
+    course_code: str
+    course_name: str
+    credits: RecommendedCourseCredits
+    type: Literal["تخصصی", "عمومی", "اختیاری"]
+    priority: Literal["بالا", "متوسط", "پایین"]
+    reason: str = Field(description="دلیل پیشنهاد")
+
+
+class RecommendationResponse(BaseModel):
+    """Structured-output schema for course recommendations."""
+    model_config = ConfigDict(extra="forbid")
+
+    mapped_grades: List[MappedGrade]
+    recommended_courses: List[RecommendedCourse]
+    total_credits: str = Field(description="مجموع واحدهای پیشنهادی")
+    analysis: str = Field(description="تحلیل کلی وضعیت دانشجو و توضیح استراتژی انتخاب واحد")
+
+
+RECOMMENDATION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "course_recommendation",
+        "strict": True,
+        "schema": RecommendationResponse.model_json_schema()
+    }
+}
+
+
 class LLMService:
     """
     Service for LLM operations using OpenAI API.
@@ -57,6 +108,10 @@ class LLMService:
         self.model = model
         self.client = AsyncOpenAI(api_key=self.api_key)
         
+        # Running prompt-cache counters for recommendation calls
+        self.prompt_tokens_total = 0
+        self.cached_prompt_tokens_total = 0
+        
         logger.info(f"Initialized LLM service with model: {model}")
     
     async def parse_grades_text(self, text: str, valid_courses: Optional[List[dict]] = None) -> GradeParseResult:
@@ -384,7 +439,8 @@ Parse the following grade text from an Iranian university student. Extract cours
         self,
         context: str,
         student_preferences: Optional[Dict[str, Any]] = None,
-        available_courses: Optional[List[Dict[str, Any]]] = None
+        available_courses: Optional[List[Dict[str, Any]]] = None,
+        structured: bool = False
     ) -> Dict[str, Any]:
         """
         Generate course recommendations using LLM.
@@ -393,6 +449,8 @@ Parse the following grade text from an Iranian university student. Extract cours
             context: Formatted context about student and academic rules
             student_preferences: User preferences for course selection
             available_courses: List of available courses for the semester
+            structured: Request a RecommendationResponse via JSON-schema
+                structured output; context is then sent as the complete prompt
             
         Returns:
             Dict with LLM recommendations and analysis
@@ -401,7 +459,10 @@ Parse the following grade text from an Iranian university student. Extract cours
             logger.info("Generating course recommendations using LLM")
             
             # Prepare the recommendation prompt
-            prompt = self._prepare_recommendation_prompt(context, student_preferences, available_courses)
+            if structured:
+                prompt = context
+            else:
+                prompt = self._prepare_recommendation_prompt(context, student_preferences, available_courses)
             
             # Log prompt in debug mode only
             logger.debug(f"Sending prompt to LLM (length: {len(prompt)} chars)")
@@ -428,17 +489,23 @@ Parse the following grade text from an Iranian university student. Extract cours
                     }
                 ],
                 temperature=0.3,  # Moderate creativity for recommendations
-                max_tokens=2000
+                max_tokens=2000,
+                **({"response_format": RECOMMENDATION_RESPONSE_FORMAT} if structured else {})
             )
             
             # Parse the LLM response
             llm_response = response.choices[0].message.content
+            usage = self._record_prompt_cache_usage(response.usage)
             
             # Log response in debug mode only
             logger.debug(f"Received LLM response (length: {len(llm_response)} chars)")
             
             # Extract structured information from response
-            recommendations = self._parse_recommendation_response(llm_response)
+            if structured:
+                parsed = RecommendationResponse.model_validate_json(llm_response)
+                recommendations = self._recommendations_from_json(parsed.model_dump())
+            else:
+                recommendations = self._parse_recommendation_response(llm_response)
             
             logger.info(f"Generated {len(recommendations.get('courses', []))} course recommendations")
             
@@ -446,7 +513,11 @@ Parse the following grade text from an Iranian university student. Extract cours
                 "success": True,
                 "recommendations": recommendations,
                 "raw_response": llm_response,
-                "analysis": self._analyze_llm_recommendations(recommendations, available_courses or [])
+                "usage": usage,
+                "analysis": (
+                    self._analyze_llm_recommendations(recommendations, available_courses)
+                    if available_courses is not None else {}
+                )
             }
             
         except Exception as e:
@@ -459,6 +530,39 @@ Parse the following grade text from an Iranian university student. Extract cours
                 "analysis": {}
             }
     
+    @property
+    def prompt_cache_hit_ratio(self) -> float:
+        """Share of recommendation prompt tokens served from the provider's prompt cache."""
+        if not self.prompt_tokens_total:
+            return 0.0
+        return self.cached_prompt_tokens_total / self.prompt_tokens_total
+    
+    def _record_prompt_cache_usage(self, usage: Any) -> Dict[str, int]:
+        """
+        Record prompt-cache usage reported by the API.
+        
+        A cached token count of zero on repeated calls means the static
+        prompt prefix changed between requests and is not being reused.
+        
+        Args:
+            usage: ``usage`` object from a chat completion response
+            
+        Returns:
+            Dict with prompt and cached prompt token counts
+        """
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", 0) or 0
+        
+        self.prompt_tokens_total += prompt_tokens
+        self.cached_prompt_tokens_total += cached_tokens
+        
+        logger.debug(
+            f"Prompt cache: {cached_tokens}/{prompt_tokens} tokens cached "
+            f"(running hit ratio {self.prompt_cache_hit_ratio:.2f})"
+        )
+        return {"prompt_tokens": prompt_tokens, "cached_prompt_tokens": cached_tokens}
+    
     def _prepare_recommendation_prompt(
         self,
         context: str, 
@@ -636,33 +740,7 @@ Parse the following grade text from an Iranian university student. Extract cours
                         import json
                         json_data = json.loads(json_match.group(1))
                         if "recommended_courses" in json_data:
-                            for course in json_data["recommended_courses"]:
-                                course_info = {
-                                    'course_code': course.get('course_code', ''),
-                                    'course_name': course.get('course_name', ''),
-                                    'credits': course.get('credits', {}),
-                                    'time_slots': ['نامشخص'],
-                                    'instructor': course.get('instructor', 'نامشخص'),
-                                    'type': course.get('type', 'تخصصی'),
-                                    'priority': course.get('priority', 'متوسط'),
-                                    'reason': course.get('reason', '')
-                                }
-                                recommendations["courses"].append(course_info)
-                            
-                            # Create simple weekly schedule from courses
-                            weekdays = ["شنبه", "یکشنبه", "دوشنبه", "سه‌شنبه", "چهارشنبه", "پنج‌شنبه"]
-                            for i, course in enumerate(recommendations["courses"]):
-                                if i < len(weekdays):
-                                    day = weekdays[i]
-                                    recommendations["weekly_schedule"][day] = [course]
-                            
-                            # Extract analysis from JSON
-                            recommendations["explanation"] = json_data.get("analysis", "")
-                            recommendations["summary"] = {
-                                "total_credits": json_data.get("total_credits", "نامشخص"),
-                                "course_count": len(recommendations["courses"]),
-                                "passed_grades": len(json_data.get("mapped_grades", []))
-                            }
+                            recommendations = self._recommendations_from_json(json_data)
                             
                             logger.debug(f"Parsed JSON response with {len(recommendations['courses'])} courses")
                             return recommendations
@@ -725,6 +803,54 @@ Parse the following grade text from an Iranian university student. Extract cours
             logger.error(f"Error parsing LLM recommendation response: {e}")
             return {"error": str(e), "courses": [], "weekly_schedule": {}}
     
+    def _recommendations_from_json(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert a JSON recommendation payload into structured format.
+        
+        Args:
+            json_data: Dict shaped like RecommendationResponse
+            
+        Returns:
+            Structured recommendation data
+        """
+        recommendations = {
+            "weekly_schedule": {},
+            "summary": {},
+            "explanation": "",
+            "warnings": [],
+            "courses": []
+        }
+        
+        for course in json_data.get("recommended_courses", []):
+            course_info = {
+                'course_code': course.get('course_code', ''),
+                'course_name': course.get('course_name', ''),
+                'credits': course.get('credits', {}),
+                'time_slots': ['نامشخص'],
+                'instructor': course.get('instructor', 'نامشخص'),
+                'type': course.get('type', 'تخصصی'),
+                'priority': course.get('priority', 'متوسط'),
+                'reason': course.get('reason', '')
+            }
+            recommendations["courses"].append(course_info)
+        
+        # Create simple weekly schedule from courses
+        weekdays = ["شنبه", "یکشنبه", "دوشنبه", "سه‌شنبه", "چهارشنبه", "پنج‌شنبه"]
+        for i, course in enumerate(recommendations["courses"]):
+            if i < len(weekdays):
+                day = weekdays[i]
+                recommendations["weekly_schedule"][day] = [course]
+        
+        # Extract analysis from JSON
+        recommendations["explanation"] = json_data.get("analysis", "")
+        recommendations["summary"] = {
+            "total_credits": json_data.get("total_credits", "نامشخص"),
+            "course_count": len(recommendations["courses"]),
+            "passed_grades": len(json_data.get("mapped_grades", []))
+        }
+        
+        return recommendations
+    
     def _extract_course_from_line(self, line: str) -> Optional[Dict[str, Any]]:
         """
         Extract course information from a single line.
@@ -9,6 +9,7 @@ from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 import asyncio
 from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.context_assembly import ContextAssemblyService
 from app.services.academic_rules import AcademicRulesEngine
@@ -54,7 +55,8 @@ class RecommendationEngine:
         student_id: int,
         target_semester: str,
         user_preferences: Optional[Dict[str, Any]] = None,
-        use_llm: bool = True
+        use_llm: bool = True,
+        db: Optional[AsyncSession] = None
     ) -> Dict[str, Any]:
         """تولید پیشنهاد کامل دروس"""
         
@@ -63,7 +65,7 @@ class RecommendationEngine:
             
             # 1. تجمیع کانتکست کامل
             context = await self.context_assembly.assemble_complete_context(
-                student_id, target_semester, user_preferences
+                student_id, target_semester, user_preferences, db=db
             )
             
             # 2. پیشنهاد اولیه بر اساس قوانین
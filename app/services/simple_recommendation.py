@@ -4,16 +4,292 @@ Simple LLM-based recommendation service for CourseWise.
 Replaces complex context assembly and rule engines with direct LLM processing.
 """
 
-import json
+import asyncio
+import copy
+import io
 import logging
+import os
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from hashlib import blake2b
 from pathlib import Path
-from typing import Dict, Any, Optional
+from string import Template
+from typing import Dict, Any, Final, List, Optional, Tuple
+
+import anyio
+import orjson
+from cachetools import TTLCache
 
 from app.config import settings
 from app.services.llm import LLMService
 
 logger = logging.getLogger(__name__)
 
+_DATA: Final = Path("data")
+_OFFERINGS_DIR: Final = _DATA / "offerings"
+
+# Keyed by ``entry_year >= 1403``
+_CURRICULUM_PATHS: Final[Dict[bool, str]] = {
+    True: os.fspath(_DATA / "curriculum_1403_onwards.json"),
+    False: os.fspath(_DATA / "curriculum_before_1403.json"),
+}
+
+# Pre-rendered curriculum text written by ``python -m app.scripts.build_static_text``,
+# keyed by the source JSON path
+CURRICULUM_TEXT_PATHS: Final[Dict[str, str]] = {
+    json_path: os.fspath(Path(json_path).with_suffix(".txt"))
+    for json_path in _CURRICULUM_PATHS.values()
+}
+
+CREDIT_LIMIT_LOW: Final = "مشروط: حداکثر 14 واحد"
+CREDIT_LIMIT_MID: Final = "معمولی: حداکثر 20 واحد"
+CREDIT_LIMIT_HIGH: Final = "عالی: حداکثر 24 واحد"
+
+FALLBACK_RESPONSE: Final[Dict[str, Any]] = {
+    "success": False,
+    "message": "متأسفانه سرویس پیشنهاد درس موقتاً در دسترس نیست. لطفاً مجدداً تلاش کنید.",
+    "courses": [],
+    "analysis": "امکان تحلیل وضعیت تحصیلی در حال حاضر فراهم نیست."
+}
+
+# The prompt is laid out static-first so the provider's prompt cache can reuse
+# its prefix: the rubric is identical for every request, the curriculum and
+# offerings only vary by cohort, and every per-student value lives in the
+# trailing block that starts with STUDENT_BLOCK_HEADER.
+STUDENT_BLOCK_HEADER: Final = "اطلاعات دانشجو:"
+
+_PROMPT_TEMPLATE: Final = Template("""تو یک مشاور تحصیلی هستی برای دانشگاه آزاد شهرکرد، رشته مهندسی کامپیوتر.
+اطلاعات و نمرات دانشجو در انتهای این پیام آمده است.
+
+📋 **راهنمای کامل انتخاب دروس:**
+
+🎯 **گروه‌بندی دروس ارائه شده:**
+1. **🎓 دروس مخصوص سال ورودی:**
+   - برای ترم‌های 1-2 مخصوص ورودی خاص
+   - اگر دانشجو ترم 3 یا بالاتر است این دروس معمولاً مناسب نیست
+   - فقط اگر دانشجو این دروس را افتاده باشد
+
+2. **📚 دروس آزاد (ترم 3 به بعد):**
+   - بر اساس ترم هدف طبقه‌بندی شده
+   - باید پیش‌نیازها بررسی شود
+   - دروس ترم فعلی دانشجو و بالاتر مناسب
+
+3. **🌐 دروس عمومی:**
+   - همه ارائه می‌شوند (بدون محدودیت زمانی)
+   - قوانین خاص دارند - حتماً رعایت کن
+   - اولویت با دروس تخصصی
+
+4. **🏗️ پروژه‌ها و کارآموزی:**
+   - برای ترم‌های انتهایی
+   - نیاز به پیش‌نیازهای خاص
+
+⚠️ **نکات بحرانی برای انتخاب:**
+
+🔍 **بررسی‌های الزامی:**
+1. **آیا درس در دسترس است؟** (بررسی لیست ارائه شده)
+2. **پیش‌نیازهای گذرانده شده؟** (بررسی نمرات و چارت)
+3. **مناسب برای ترم فعلی؟** (ترم فعلی در اطلاعات دانشجو)
+4. **رعایت قوانین عمومی؟** (معارف، زبان، تربیت بدنی)
+
+🎯 **اولویت‌بندی هوشمند:**
+1. **🚨 دروس افتاده** (اولویت 100%) - اگر نمره‌ای < 10 یا درس گم شده
+2. **⭐ دروس ترم فعلی** (اولویت 90%) - مطابق چارت درسی
+3. **🔗 پیش‌نیازها** (اولویت 85%) - برای باز کردن دروس آینده  
+4. **📖 عمومی باقی‌مانده** (اولویت 75%) - تکمیل دروس عمومی
+5. **🆕 دروس آینده** (اولویت 60%) - اگر جا باقی مانده
+
+📖 **قوانین ویژه دروس عمومی:**
+- **معارف اسلامی**: فقط یک درس در هر ترم
+- **زبان‌ها**: ترتیبی (پیش → انگلیسی 1 → انگلیسی 2 → تخصصی)
+- **تربیت بدنی**: حداکثر 2 واحد کل دوره
+- **کارگاه**: آشنایی با صنعت → کارآفرینی
+
+🔄 **مراحل تصمیم‌گیری:**
+
+**1. 🧾 تحلیل وضعیت دانشجو:**
+   - تطبیق نمرات با چارت درسی (استاندارد کردن نام‌ها)
+   - شناسایی دروس افتاده (نمره < 10) یا گم شده
+   - بررسی ترم فعلی و پیشرفت تحصیلی
+
+**2. 🎯 انتخاب دروس بر اساس اولویت:**
+   - **اولویت 1**: دروس افتاده که در این ترم ارائه می‌شوند
+   - **اولویت 2**: دروس الزامی ترم فعلی دانشجو (مطابق چارت)
+   - **اولویت 3**: پیش‌نیازهای مهم برای ترم‌های آینده
+   - **اولویت 4**: دروس عمومی (بر اساس قوانین خاص)
+   - **اولویت 5**: دروس اختیاری یا پیشرفته (اگر جا باقی مانده)
+
+**3. ✅ اعتبارسنجی نهایی:**
+   - کل واحدها ≤ محدودیت واحد دانشجو
+   - همه دروس در لیست ارائه شده موجود باشند
+   - پیش‌نیازها رعایت شده باشند
+   - قوانین دروس عمومی نقض نشده باشند
+
+**مهم**: فقط دروسی پیشنهاد بده که در لیست "دروس ارائه شده این ترم" موجودند! اگر درسی در آن لیست نیست، پیشنهاد نکن.
+
+چارت درسی:
+$curriculum
+
+دروس ارائه شده این ترم:
+$offerings
+
+""" + STUDENT_BLOCK_HEADER + """
+- ورودی: $entry_year
+- ترم فعلی: $current_semester
+- معدل ترم قبل: $last_semester_gpa
+- معدل کل: $overall_gpa
+- محدودیت واحد: $credit_limit
+
+نمرات ارائه شده توسط دانشجو:
+$raw_grades""")
+
+# Successful responses keyed by a digest of the request inputs, so a student
+# re-submitting the same form within the TTL does not trigger another LLM call
+_recommendation_cache: TTLCache = TTLCache(maxsize=512, ttl=600)
+
+
+def _recommendation_cache_key(
+    entry_year: int,
+    current_semester: int,
+    raw_grades: str,
+    last_semester_gpa: float,
+    overall_gpa: float,
+    target_semester: str
+) -> str:
+    """Content-addressed key for a recommendation request"""
+    
+    raw_key = f"{entry_year}|{current_semester}|{raw_grades}|{last_semester_gpa}|{overall_gpa}|{target_semester}"
+    return blake2b(raw_key.encode(), digest_size=16).hexdigest()
+
+
+@dataclass(slots=True, frozen=True)
+class OfferedCourse:
+    """A single offered course, normalized once when offerings are loaded"""
+    code: str
+    name: str
+    theoretical: int
+    practical: int
+    instructor: Optional[str]
+    type: Optional[str]
+
+
+@dataclass(frozen=True)
+class _OfferingsIndex:
+    """
+    Flat view of an offerings file, built once per process.
+    
+    All courses live in a single ``courses`` table; the remaining fields
+    are index lists into it so formatting never re-walks the nested JSON.
+    """
+    raw: Dict[str, Any]
+    courses: List[OfferedCourse]
+    entry_year_to_idx: Dict[str, Dict[str, List[int]]]
+    sorted_entry_years: Tuple[str, ...]
+    sorted_semesters_by_entry_year: Dict[str, Tuple[str, ...]]
+    has_open_courses: bool
+    open_by_semester: Dict[int, List[int]]
+    sorted_open_semesters: Tuple[int, ...]
+    general_by_type: Dict[str, List[int]]
+    special_project_idx: List[int]
+
+
+def _build_offerings_index(data: Dict[str, Any]) -> _OfferingsIndex:
+    """Flatten nested offerings JSON into an ``_OfferingsIndex``"""
+    
+    courses: List[OfferedCourse] = []
+    
+    def add(course: Dict[str, Any], default_type: Optional[str] = None) -> int:
+        credits = course.get("credits", {})
+        courses.append(OfferedCourse(
+            code=course.get("course_code"),
+            name=course.get("course_name"),
+            theoretical=credits.get("theoretical", 0),
+            practical=credits.get("practical", 0),
+            instructor=course.get("instructor") or None,
+            type=course.get("type", default_type),
+        ))
+        return len(courses) - 1
+    
+    entry_year_to_idx: Dict[str, Dict[str, List[int]]] = {}
+    for entry_year_key, group_data in (data.get("entry_year_groups") or {}).items():
+        entry_year_to_idx[entry_year_key] = {
+            semester_key: [add(course) for course in semester_data.get("courses", [])]
+            for semester_key, semester_data in group_data.get("semesters", {}).items()
+        }
+    
+    open_courses = data.get("open_courses", {}).get("courses") or []
+    open_by_semester: Dict[int, List[int]] = {}
+    for course in open_courses:
+        i = add(course)
+        for semester in course.get("target_semesters", []):
+            open_by_semester.setdefault(semester, []).append(i)
+    
+    general_by_type: Dict[str, List[int]] = {}
+    for course in data.get("general_courses", {}).get("courses") or []:
+        i = add(course, "عمومی")
+        general_by_type.setdefault(courses[i].type, []).append(i)
+    
+    special_project_idx = [add(project) for project in data.get("special_projects") or []]
+    
+    return _OfferingsIndex(
+        raw=data,
+        courses=courses,
+        entry_year_to_idx=entry_year_to_idx,
+        sorted_entry_years=tuple(sorted(entry_year_to_idx)),
+        sorted_semesters_by_entry_year={
+            entry_year_key: tuple(sorted(semesters, key=int))
+            for entry_year_key, semesters in entry_year_to_idx.items()
+        },
+        has_open_courses=bool(open_courses),
+        open_by_semester=open_by_semester,
+        sorted_open_semesters=tuple(sorted(open_by_semester)),
+        general_by_type=general_by_type,
+        special_project_idx=special_project_idx,
+    )
+
+
+@lru_cache(maxsize=8)
+def _offerings_paths(semester: str) -> Tuple[str, str]:
+    """(new structure, old structure) offerings file paths for a semester"""
+    
+    return (
+        os.fspath(_OFFERINGS_DIR / f"{semester}_new.json"),
+        os.fspath(_OFFERINGS_DIR / f"{semester}.json"),
+    )
+
+
+async def _resolve_offerings_path(semester: str) -> str:
+    """Prefer the new offerings structure, fall back to the old one"""
+    
+    new_path, old_path = _offerings_paths(semester)
+    return new_path if await anyio.Path(new_path).exists() else old_path
+
+
+# Indexed offerings per target semester; the file path is resolved together
+# with the parse, so a cache hit awaits no file I/O at all
+_offerings_cache: Dict[str, _OfferingsIndex] = {}
+
+
+async def _offerings_cached(semester: str) -> _OfferingsIndex:
+    """
+    Resolve, load and index a semester's offerings file once per process.
+    
+    Raises:
+        FileNotFoundError: If neither offerings structure exists for the semester
+    """
+    
+    index = _offerings_cache.get(semester)
+    if index is None:
+        file_path = await _resolve_offerings_path(semester)
+        data = orjson.loads(await anyio.Path(file_path).read_bytes())
+        index = _offerings_cache[semester] = _build_offerings_index(data)
+    
+    return index
+
+
+# Curriculum prompt text per curriculum JSON path, rendered once per process
+_curriculum_text_cache: Dict[str, str] = {}
+
 
 class SimpleRecommendationService:
     """
@@ -28,7 +304,6 @@ class SimpleRecommendationService:
     
     def __init__(self):
         self.llm = LLMService()
-        self.data_path = Path("data")
     
     async def get_recommendation(
         self,
@@ -54,10 +329,21 @@ class SimpleRecommendationService:
             Dict with recommendations and metadata
         """
         
+        cache_key = _recommendation_cache_key(
+            student_entry_year, current_semester, raw_grades,
+            last_semester_gpa, overall_gpa, target_semester
+        )
+        cached = _recommendation_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Serving cached recommendation for entry_year={student_entry_year}, semester={current_semester}")
+            return copy.deepcopy(cached)
+        
         try:
-            # 1. Load static data files
-            curriculum = self._load_curriculum(student_entry_year)
-            offerings = self._load_offerings(target_semester, student_entry_year, current_semester)
+            # 1. Load static data files (async I/O, concurrently)
+            curriculum, offerings = await asyncio.gather(
+                self._load_curriculum(student_entry_year),
+                self._load_offerings(target_semester, student_entry_year, current_semester)
+            )
             
             # 2. Calculate academic constraints
             credit_limit = self._get_credit_limit(overall_gpa)
@@ -79,8 +365,7 @@ class SimpleRecommendationService:
             
             response = await self.llm.generate_course_recommendations(
                 context=prompt,
-                student_preferences={},
-                available_courses=[]
+                structured=True
             )
             
             if not response or not response.get("success"):
@@ -88,13 +373,13 @@ class SimpleRecommendationService:
                 return self._create_fallback_response()
             
             # 5. Enrich courses with offerings data
-            enriched_recommendations = self._enrich_courses_with_offerings(
+            enriched_recommendations = await self._enrich_courses_with_offerings(
                 response.get("recommendations", {}), 
                 target_semester
             )
             
             # 6. Structure response
-            return {
+            result = {
                 "success": True,
                 "recommendations": enriched_recommendations,
                 "metadata": {
@@ -105,6 +390,8 @@ class SimpleRecommendationService:
                     "overall_gpa": overall_gpa
                 }
             }
+            _recommendation_cache[cache_key] = copy.deepcopy(result)
+            return result
             
         except Exception as e:
             logger.error(f"Recommendation failed: {e}")
@@ -114,39 +401,44 @@ class SimpleRecommendationService:
                 "fallback": self._create_fallback_response()
             }
     
-    def _load_curriculum(self, entry_year: int) -> str:
+    async def _load_curriculum(self, entry_year: int) -> str:
         """Load curriculum chart based on entry year"""
         
+        json_file = _CURRICULUM_PATHS[entry_year >= 1403]
+        text = _curriculum_text_cache.get(json_file)
+        if text is not None:
+            return text
+        
         try:
-            if entry_year >= 1403:
-                file_path = self.data_path / "curriculum_1403_onwards.json"
-            else:
-                file_path = self.data_path / "curriculum_before_1403.json"
+            json_path = anyio.Path(json_file)
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            # Convert to simple text format for LLM
-            return self._format_curriculum_for_llm(data)
+            # Serve the pre-rendered text unless the JSON changed after it was built
+            text_path = anyio.Path(CURRICULUM_TEXT_PATHS[json_file])
+            if await text_path.exists():
+                if (await text_path.stat()).st_mtime_ns >= (await json_path.stat()).st_mtime_ns:
+                    text = await text_path.read_text(encoding="utf-8")
+                else:
+                    logger.warning(f"Pre-rendered curriculum {text_path} is stale, formatting live")
+            
+            if text is None:
+                # Convert to simple text format for LLM
+                text = self._format_curriculum_for_llm(orjson.loads(await json_path.read_bytes()))
+            
+            _curriculum_text_cache[json_file] = text
+            return text
             
         except Exception as e:
             logger.error(f"Failed to load curriculum for {entry_year}: {e}")
             return "چارت درسی در دسترس نیست"
     
-    def _load_offerings(self, semester: str, student_entry_year: int = None, student_semester: int = None) -> str:
+    async def _load_offerings(self, semester: str, student_entry_year: int = None, student_semester: int = None) -> str:
         """Load course offerings for target semester with proper filtering"""
         
         try:
-            # Try new structure first, fallback to old
-            file_path = self.data_path / "offerings" / f"{semester}_new.json"
-            if not file_path.exists():
-                file_path = self.data_path / "offerings" / f"{semester}.json"
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            index = await _offerings_cached(semester)
             
             # Convert to simple text format with smart filtering
-            return self._format_offerings_for_llm(data, student_entry_year, student_semester)
+            return self._format_offerings_for_llm(index, student_entry_year, student_semester)
             
         except Exception as e:
             logger.error(f"Failed to load offerings for {semester}: {e}")
@@ -157,13 +449,14 @@ class SimpleRecommendationService:
         """Calculate credit limit based on GPA"""
         
         if gpa < 12.0:
-            return "مشروط: حداکثر 14 واحد"
+            return CREDIT_LIMIT_LOW
         elif gpa >= 17.0:
-            return "عالی: حداکثر 24 واحد"
+            return CREDIT_LIMIT_HIGH
         else:
-            return "معمولی: حداکثر 20 واحد"
+            return CREDIT_LIMIT_MID
     
-    def _format_curriculum_for_llm(self, curriculum: Dict) -> str:
+    @staticmethod
+    def _format_curriculum_for_llm(curriculum: Dict) -> str:
         """Convert curriculum JSON to simple text for LLM"""
         
         text = f"چارت درسی ورودی {curriculum.get('entry_years', [])}\n"
@@ -180,126 +473,117 @@ class SimpleRecommendationService:
         
         return text
     
-    def _format_offerings_for_llm(self, offerings: Dict, student_entry_year: int = None, student_semester: int = None) -> str:
+    def _format_offerings_for_llm(self, index: "_OfferingsIndex", student_entry_year: int = None, student_semester: int = None) -> str:
         """Convert offerings to text format for LLM"""
         
+        offerings = index.raw
         text = f"دروس ارائه شده ترم {offerings.get('semester', '')}\n\n"
         
         # Include all courses
         if "entry_year_groups" in offerings:
-            text += self._format_all_offerings_structure(offerings)
+            text += self._format_all_offerings_structure(index, student_entry_year, student_semester)
         else:
             # Use old format
             text += self._format_old_offerings_structure(offerings)
         
         return text
     
-    def _format_all_offerings_structure(self, offerings: Dict) -> str:
-        """Format all offerings without filtering"""
+    def _format_all_offerings_structure(
+        self,
+        index: "_OfferingsIndex",
+        student_entry_year: int = None,
+        student_semester: int = None
+    ) -> str:
+        """
+        Format offerings relevant to the student.
         
-        text = ""
+        Only the student's own entry-year group is included, and open courses
+        targeting semesters beyond ``student_semester + 2`` are dropped. Lower
+        semesters are kept so failed courses remain visible for retakes.
+        General courses and projects are never filtered.
+        """
+        
+        courses = index.courses
+        buf = io.StringIO()
+        write = buf.write
+        
+        if student_entry_year is None:
+            entry_year_keys = index.sorted_entry_years
+        else:
+            entry_year_keys = ("1403" if student_entry_year >= 1403 else "pre_1403",)
+        
+        open_semesters = index.sorted_open_semesters
+        if student_semester is not None:
+            open_semesters = open_semesters[:bisect_right(open_semesters, student_semester + 2)]
         
         # Entry year specific courses
-        entry_year_groups = offerings.get("entry_year_groups", {})
-        if entry_year_groups:
-            text += "🎓 دروس مخصوص سال ورودی:\n\n"
+        if index.entry_year_to_idx:
+            write("🎓 دروس مخصوص سال ورودی:\n\n")
             
-            for entry_year_key, group_data in entry_year_groups.items():
+            for entry_year_key in entry_year_keys:
+                semesters = index.entry_year_to_idx.get(entry_year_key)
+                if semesters is None:
+                    continue
                 entry_year_display = "1403 به بعد" if entry_year_key == "1403" else "1402 و قبل"
-                text += f"  📅 ورودی {entry_year_display}:\n"
+                write(f"  📅 ورودی {entry_year_display}:\n")
                 
-                semesters = group_data.get("semesters", {})
-                for semester_key in sorted(semesters.keys()):
-                    semester_data = semesters[semester_key]
-                    text += f"    ترم {semester_key}:\n"
-                    
-                    for course in semester_data.get("courses", []):
-                        credits = course.get("credits", {})
-                        theoretical = credits.get("theoretical", 0)
-                        practical = credits.get("practical", 0)
-                        text += f"      - {course.get('course_code')}: {course.get('course_name')} "
-                        text += f"({theoretical}+{practical} واحد)"
-                        if course.get('instructor'):
-                            text += f" - استاد: {course['instructor']}"
-                        text += "\n"
-                    text += "\n"
-                text += "\n"
+                for semester_key in index.sorted_semesters_by_entry_year[entry_year_key]:
+                    write(f"    ترم {semester_key}:\n")
+                    for i in semesters[semester_key]:
+                        c = courses[i]
+                        if c.instructor:
+                            write(f"      - {c.code}: {c.name} ({c.theoretical}+{c.practical} واحد) - استاد: {c.instructor}\n")
+                        else:
+                            write(f"      - {c.code}: {c.name} ({c.theoretical}+{c.practical} واحد)\n")
+                    write("\n")
+                write("\n")
         
         # Open courses (semester 3+)
-        open_courses = offerings.get("open_courses", {})
-        if open_courses.get("courses"):
-            text += "📚 دروس آزاد (ترم 3 به بعد):\n"
-            
-            # Group by target semester for better organization
-            courses_by_semester = {}
-            for course in open_courses["courses"]:
-                target_semesters = course.get("target_semesters", [])
-                for semester in target_semesters:
-                    if semester not in courses_by_semester:
-                        courses_by_semester[semester] = []
-                    courses_by_semester[semester].append(course)
-            
-            # Show courses by semester
-            for semester in sorted(courses_by_semester.keys()):
-                text += f"\n  دروس ترم {semester}:\n"
-                for course in courses_by_semester[semester]:
-                    credits = course.get("credits", {})
-                    theoretical = credits.get("theoretical", 0)
-                    practical = credits.get("practical", 0)
-                    text += f"    - {course.get('course_code')}: {course.get('course_name')} "
-                    text += f"({theoretical}+{practical} واحد)"
-                    if course.get('instructor'):
-                        text += f" - استاد: {course['instructor']}"
-                    text += "\n"
-            text += "\n"
+        if index.has_open_courses:
+            write("📚 دروس آزاد (ترم 3 به بعد):\n")
+            
+            for semester in open_semesters:
+                write(f"\n  دروس ترم {semester}:\n")
+                for i in index.open_by_semester[semester]:
+                    c = courses[i]
+                    if c.instructor:
+                        write(f"    - {c.code}: {c.name} ({c.theoretical}+{c.practical} واحد) - استاد: {c.instructor}\n")
+                    else:
+                        write(f"    - {c.code}: {c.name} ({c.theoretical}+{c.practical} واحد)\n")
+            write("\n")
         
         # General courses
-        general_courses = offerings.get("general_courses", {})
-        if general_courses.get("courses"):
-            text += "🌐 دروس عمومی (همه ارائه می‌شوند):\n"
-            text += general_courses.get("description", "") + "\n\n"
-            
-            # Group by type
-            courses_by_type = {}
-            for course in general_courses["courses"]:
-                course_type = course.get("type", "عمومی")
-                if course_type not in courses_by_type:
-                    courses_by_type[course_type] = []
-                courses_by_type[course_type].append(course)
-            
-            for course_type, courses in courses_by_type.items():
-                text += f"  {course_type}:\n"
-                for course in courses:
-                    credits = course.get("credits", {})
-                    theoretical = credits.get("theoretical", 0)
-                    practical = credits.get("practical", 0)
-                    text += f"    - {course.get('course_code')}: {course.get('course_name')} "
-                    text += f"({theoretical}+{practical} واحد)\n"
-                text += "\n"
+        if index.general_by_type:
+            general_courses = index.raw["general_courses"]
+            write("🌐 دروس عمومی (همه ارائه می‌شوند):\n")
+            write(f"{general_courses.get('description', '')}\n\n")
+            
+            for course_type, type_idx in index.general_by_type.items():
+                write(f"  {course_type}:\n")
+                for i in type_idx:
+                    c = courses[i]
+                    write(f"    - {c.code}: {c.name} ({c.theoretical}+{c.practical} واحد)\n")
+                write("\n")
             
             # Add rules
             rules = general_courses.get("rules", {})
             if rules:
-                text += "📋 قوانین دروس عمومی:\n"
+                write("📋 قوانین دروس عمومی:\n")
                 if rules.get("معارف"):
-                    text += f"  - {rules['معارف']}\n"
+                    write(f"  - {rules['معارف']}\n")
                 for rule in rules.get("special_rules", []):
-                    text += f"  - {rule}\n"
-                text += "\n"
+                    write(f"  - {rule}\n")
+                write("\n")
         
         # Special projects
-        special_projects = offerings.get("special_projects", [])
-        if special_projects:
-            text += "🏗️ پروژه‌ها و کارآموزی:\n"
-            for project in special_projects:
-                credits = project.get("credits", {})
-                theoretical = credits.get("theoretical", 0)
-                practical = credits.get("practical", 0)
-                text += f"  - {project.get('course_code')}: {project.get('course_name')} "
-                text += f"({theoretical}+{practical} واحد)\n"
-            text += "\n"
+        if index.special_project_idx:
+            write("🏗️ پروژه‌ها و کارآموزی:\n")
+            for i in index.special_project_idx:
+                c = courses[i]
+                write(f"  - {c.code}: {c.name} ({c.theoretical}+{c.practical} واحد)\n")
+            write("\n")
         
-        return text
+        return buf.getvalue()
     
 
     def _format_old_offerings_structure(self, offerings: Dict) -> str:
@@ -322,42 +606,17 @@ class SimpleRecommendationService:
         
         return text
     
-    def _format_old_offerings_structure(self, offerings: Dict) -> str:
-        """Handle old offerings format"""
-        
-        text = ""
-        groups = offerings.get("available_groups", offerings.get("course_groups", []))
-        
-        for group in groups:
-            group_name = group.get("group_name", "")
-            text += f"گروه {group_name}:\n"
-            
-            courses = group.get("courses", [])
-            for course in courses:
-                text += f"  - {course.get('course_code', '')}: {course.get('course_name', '')}"
-                if course.get('instructor'):
-                    text += f" (استاد: {course['instructor']})"
-                text += "\n"
-            text += "\n"
-        
-        return text
-    
-    def _enrich_courses_with_offerings(self, recommendations: Dict[str, Any], target_semester: str) -> Dict[str, Any]:
+    async def _enrich_courses_with_offerings(self, recommendations: Dict[str, Any], target_semester: str) -> Dict[str, Any]:
         """Enrich LLM course recommendations with detailed info from offerings"""
         
         try:
-            # Load offerings data
-            offerings_path = self.data_path / "offerings" / f"{target_semester}_new.json"
-            if not offerings_path.exists():
-                offerings_path = self.data_path / "offerings" / f"{target_semester}.json"
-            
-            if not offerings_path.exists():
+            # Load offerings data (shared with the prompt's cached index)
+            try:
+                offerings = (await _offerings_cached(target_semester)).raw
+            except FileNotFoundError:
                 logger.warning(f"Offerings file not found: {target_semester}")
                 return recommendations
             
-            with open(offerings_path, 'r', encoding='utf-8') as f:
-                offerings = json.load(f)
-            
             # Get courses from recommendations
             courses = recommendations.get("courses", [])
             if isinstance(courses, list) and courses:
@@ -448,116 +707,20 @@ class SimpleRecommendationService:
     ) -> str:
         """Create comprehensive prompt for LLM recommendation"""
         
-        prompt = f"""تو یک مشاور تحصیلی هستی برای دانشگاه آزاد شهرکرد، رشته مهندسی کامپیوتر.
-
-اطلاعات دانشجو:
-- ورودی: {entry_year}
-- ترم فعلی: {current_semester}
-- معدل ترم قبل: {last_semester_gpa}
-- معدل کل: {overall_gpa}
-- محدودیت واحد: {credit_limit}
-
-نمرات ارائه شده توسط دانشجو:
-{raw_grades}
-
-چارت درسی:
-{curriculum}
-
-دروس ارائه شده این ترم:
-{offerings}
-
-📋 **راهنمای کامل انتخاب دروس:**
-
-🎯 **گروه‌بندی دروس ارائه شده:**
-1. **🎓 دروس مخصوص سال ورودی:**
-   - برای ترم‌های 1-2 مخصوص ورودی خاص
-   - دانشجو ترم {current_semester} است - اگر ترم 3+ است این دروس معمولاً مناسب نیست
-   - فقط اگر دانشجو این دروس را افتاده باشد
-
-2. **📚 دروس آزاد (ترم 3 به بعد):**
-   - بر اساس ترم هدف طبقه‌بندی شده
-   - باید پیش‌نیازها بررسی شود
-   - دانشجو ترم {current_semester} است - دروس ترم {current_semester} و بالاتر مناسب
-
-3. **🌐 دروس عمومی:**
-   - همه ارائه می‌شوند (بدون محدودیت زمانی)
-   - قوانین خاص دارند - حتماً رعایت کن
-   - اولویت با دروس تخصصی
-
-4. **🏗️ پروژه‌ها و کارآموزی:**
-   - برای ترم‌های انتهایی
-   - نیاز به پیش‌نیازهای خاص
-
-⚠️ **نکات بحرانی برای انتخاب:**
-
-🔍 **بررسی‌های الزامی:**
-1. **آیا درس در دسترس است؟** (بررسی لیست ارائه شده)
-2. **پیش‌نیازهای گذرانده شده؟** (بررسی نمرات و چارت)
-3. **مناسب برای ترم فعلی؟** (ترم {current_semester})
-4. **رعایت قوانین عمومی؟** (معارف، زبان، تربیت بدنی)
-
-🎯 **اولویت‌بندی هوشمند:**
-1. **🚨 دروس افتاده** (اولویت 100%) - اگر نمره‌ای < 10 یا درس گم شده
-2. **⭐ دروس ترم فعلی** (اولویت 90%) - مطابق چارت درسی
-3. **🔗 پیش‌نیازها** (اولویت 85%) - برای باز کردن دروس آینده  
-4. **📖 عمومی باقی‌مانده** (اولویت 75%) - تکمیل دروس عمومی
-5. **🆕 دروس آینده** (اولویت 60%) - اگر جا باقی مانده
-
-📖 **قوانین ویژه دروس عمومی:**
-- **معارف اسلامی**: فقط یک درس در هر ترم
-- **زبان‌ها**: ترتیبی (پیش → انگلیسی 1 → انگلیسی 2 → تخصصی)
-- **تربیت بدنی**: حداکثر 2 واحد کل دوره
-- **کارگاه**: آشنایی با صنعت → کارآفرینی
-
-🔄 **مراحل تصمیم‌گیری:**
-
-**1. 🧾 تحلیل وضعیت دانشجو:**
-   - تطبیق نمرات با چارت درسی (استاندارد کردن نام‌ها)
-   - شناسایی دروس افتاده (نمره < 10) یا گم شده
-   - بررسی ترم فعلی و پیشرفت تحصیلی
-
-**2. 🎯 انتخاب دروس بر اساس اولویت:**
-   - **اولویت 1**: دروس افتاده که در این ترم ارائه می‌شوند
-   - **اولویت 2**: دروس الزامی ترم {current_semester} (مطابق چارت)
-   - **اولویت 3**: پیش‌نیازهای مهم برای ترم‌های آینده
-   - **اولویت 4**: دروس عمومی (بر اساس قوانین خاص)
-   - **اولویت 5**: دروس اختیاری یا پیشرفته (اگر جا باقی مانده)
-
-**3. ✅ اعتبارسنجی نهایی:**
-   - کل واحدها ≤ {credit_limit}
-   - همه دروس در لیست ارائه شده موجود باشند
-   - پیش‌نیازها رعایت شده باشند
-   - قوانین دروس عمومی نقض نشده باشند
-
-**مهم**: فقط دروسی پیشنهاد بده که در لیست "دروس ارائه شده این ترم" موجودند! اگر درسی در آن لیست نیست، پیشنهاد نکن.
-
-پاسخت رو به صورت JSON ساختار یافته بده:
-{{
-  "mapped_grades": [
-    {{"course_code": "کد درس", "course_name": "نام استاندارد", "grade": نمره, "status": "قبول/مردود"}}
-  ],
-  "recommended_courses": [
-    {{
-      "course_code": "کد درس", 
-      "course_name": "نام درس", 
-      "credits": {{"theoretical": X, "practical": Y}},
-      "type": "تخصصی/عمومی/اختیاری",
-      "priority": "بالا/متوسط/پایین",
-      "reason": "دلیل پیشنهاد"
-    }}
-  ],
-  "total_credits": "مجموع واحدهای پیشنهادی",
-  "analysis": "تحلیل کلی وضعیت دانشجو و توضیح استراتژی انتخاب واحد"
-}}"""
-
-        return prompt
+        return _PROMPT_TEMPLATE.substitute(
+            entry_year=entry_year,
+            current_semester=current_semester,
+            last_semester_gpa=last_semester_gpa,
+            overall_gpa=overall_gpa,
+            credit_limit=credit_limit,
+            raw_grades=raw_grades,
+            curriculum=curriculum,
+            offerings=offerings
+        )
     
     def _create_fallback_response(self) -> Dict[str, Any]:
         """Create fallback response when LLM fails"""
         
-        return {
-            "success": False,
-            "message": "متأسفانه سرویس پیشنهاد درس موقتاً در دسترس نیست. لطفاً مجدداً تلاش کنید.",
-            "courses": [],
-            "analysis": "امکان تحلیل وضعیت تحصیلی در حال حاضر فراهم نیست."
-        }
\ No newline at end of file
+        response = dict(FALLBACK_RESPONSE)
+        response["courses"] = []
+        return response
\ No newline at end of file
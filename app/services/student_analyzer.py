@@ -5,17 +5,28 @@ Student Context Analyzer Service
 شامل: تحلیل نمرات، بررسی پیش‌نیازها، محاسبه GPA، تعیین وضعیت تحصیلی
 """
 
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, FrozenSet, Iterable, List, Optional, Any, Tuple
+from bisect import bisect_right
 from dataclasses import dataclass
-import json
+from functools import lru_cache
+import copy
+import logging
+import math
 from pathlib import Path
+import orjson
+from cachetools import TTLCache
 from loguru import logger
 
 from app.models.student import Student, StudentGrade
 from app.models.course import Course
 from app.core.database import get_db
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, selectinload
+
+# لاگر stdlib برای مسیرهای هر درخواست (قالب‌بندی تنبل با %s)؛
+# loguru فقط برای خطاهای بارگذاری ماژول استفاده می‌شود
+log = logging.getLogger(__name__)
 
 
 @dataclass
@@ -36,41 +47,190 @@ class StudentAcademicStatus:
     graduation_progress: Dict[str, Any]
 
 
+@dataclass(slots=True)
+class CourseRecord:
+    """آخرین وضعیت یک درس دانشجو (دیکشنری فقط در مرز API ساخته می‌شود)"""
+    course_code: str
+    course_name: str
+    grade: float
+    credits: int
+    course_type: str
+    attempt_number: int = 0
+    semester_taken: str = ""
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """ساختار دیکشنری دروس مردودی/گذرانده در StudentAcademicStatus"""
+        if self.grade < 10.0:  # مردودی
+            return {
+                "course_code": self.course_code,
+                "course_name": self.course_name,
+                "grade": self.grade,
+                "attempt_number": self.attempt_number,
+                "credits": self.credits,
+                "course_type": self.course_type,
+                "priority": "high"  # دروس مردودی اولویت بالا دارند
+            }
+        return {
+            "course_code": self.course_code,
+            "course_name": self.course_name,
+            "grade": self.grade,
+            "credits": self.credits,
+            "course_type": self.course_type,
+            "semester_taken": self.semester_taken
+        }
+
+
+# انواع درس در گزارش پیشرفت و اندیس ثابت هر کدام؛ انواع دیگر به خانه آخر
+# (خارج از گزارش) می‌روند تا حلقه جمع بدون شرط باشد
+COURSE_TYPES = ("foundation", "core", "specialized", "general")
+COURSE_TYPE_IDX = {course_type: idx for idx, course_type in enumerate(COURSE_TYPES)}
+_OTHER_TYPE_IDX = len(COURSE_TYPES)
+
+
+@dataclass(frozen=True)
+class CompletedIndex:
+    """نمایه دروس گذرانده شده، یک‌بار برای هر درخواست ساخته می‌شود"""
+    codes: FrozenSet[str]
+    credits_by_code: Dict[str, int]
+    credits_by_type: Tuple[int, ...]  # به ترتیب COURSE_TYPES
+
+    @classmethod
+    def from_completed(cls, completed_courses: List[CourseRecord]) -> "CompletedIndex":
+        type_credits = [0] * (len(COURSE_TYPES) + 1)
+        credits_by_code: Dict[str, int] = {}
+        for course in completed_courses:
+            type_credits[COURSE_TYPE_IDX.get(course.course_type, _OTHER_TYPE_IDX)] += course.credits
+            credits_by_code[course.course_code] = course.credits
+        return cls(
+            codes=frozenset(credits_by_code),
+            credits_by_code=credits_by_code,
+            credits_by_type=tuple(type_credits[:_OTHER_TYPE_IDX])
+        )
+
+
+# آخرین تلاش هر درس: (رکورد نمره، نمره اعشاری، مجموع واحد)؛
+# تبدیل Decimal به float و جمع واحدها فقط یک‌بار انجام می‌شود
+LatestAttempt = Tuple[StudentGrade, float, int]
+
+
+# وضعیت‌هایی که در محاسبات حساب می‌شوند؛ هندلر نمرات passed/failed/withdrawn
+# ذخیره می‌کند و نمرات حذف‌شده (withdrawn) در معدل و دروس گذرانده اثری ندارند
+_COUNTED_STATUSES = frozenset({"passed", "failed", "confirmed"})
+
+
+# وضعیت‌های محاسبه‌شده، با کلید (شناسه دانشجو، نسخه ردیف دانشجو و نمرات)؛
+# ورود و خروج از کش فقط با کپی عمیق، چون وضعیت شامل لیست و دیکشنری است
+_status_cache: TTLCache = TTLCache(maxsize=1024, ttl=900)
+
+
+# آستانه‌های معدل برای حد واحد و وضعیت تحصیلی (برای bisect)
+_GPA_THRESHOLDS = (12.0, 15.0, 17.0)
+_STANDING_BY_BUCKET = ("probation", "normal", "good_standing", "excellent")
+
+
+def summarize_grades(grade_values: List[float], course_credits: List[int]) -> Tuple[float, int]:
+    """
+    هسته عددی محاسبه GPA و واحدهای گذرانده شده، بدون وابستگی به ORM
+    
+    ورودی‌ها لیست‌های هم‌طول نمره و واحد آخرین تلاش هر درس هستند؛ کارهای
+    دسته‌ای (مثلاً محاسبه مجدد شبانه معدل‌ها) می‌توانند مستقیماً همین تابع را
+    روی داده‌های آماده صدا بزنند.
+    """
+    # جمع‌های وزنی با math.sumprod و sum در سطح C انجام می‌شوند
+    total_credits = sum(course_credits)
+    total_points = math.sumprod(grade_values, course_credits)
+    passed_credits = sum(
+        credits for grade_value, credits in zip(grade_values, course_credits)
+        if grade_value >= 10.0  # قبولی
+    )
+    
+    gpa = total_points / total_credits if total_credits > 0 else 0.0
+    return round(gpa, 2), passed_credits
+
+
+@lru_cache(maxsize=1)
+def _load_curriculum_bundle() -> Dict[str, Any]:
+    """بارگذاری یک‌باره چارت‌های درسی از فایل‌های JSON برای کل پروسه"""
+    data_path = Path(__file__).parent.parent.parent / "data"
+    
+    # بارگذاری چارت‌های درسی (orjson مستقیماً بایت‌های UTF-8 را پارس می‌کند)
+    post_1403_chart = orjson.loads((data_path / "curriculum_1403_onwards.json").read_bytes())
+    pre_1403_chart = orjson.loads((data_path / "curriculum_before_1403.json").read_bytes())
+    
+    # دروس هر گرایش به صورت frozenset برای بررسی عضویت سریع
+    specialization_groups = dict(post_1403_chart.get("specialization_tracks", {}))
+    if "tracks" in specialization_groups:
+        specialization_groups["tracks"] = [
+            {**track, "courses": frozenset(track.get("courses", []))}
+            for track in specialization_groups["tracks"]
+        ]
+    
+    # ترکیب داده‌ها در ساختار مورد انتظار
+    return {
+        "curriculum_versions": {
+            "post_1403": post_1403_chart,
+            "pre_1403": pre_1403_chart
+        },
+        "academic_rules": {
+            "credit_limits": {
+                "gpa_17_plus": {"max_credits": 24, "min_credits": 12},
+                "gpa_15_to_17": {"max_credits": 20, "min_credits": 12},
+                "gpa_12_to_15": {"max_credits": 18, "min_credits": 12},
+                "gpa_below_12": {"max_credits": 16, "min_credits": 14}
+            }
+        },
+        "specialization_groups": specialization_groups
+    }
+
+
 class StudentAnalyzer:
     """سرویس تجزیه و تحلیل وضعیت تحصیلی دانشجو"""
     
     def __init__(self):
         self.curriculum_chart = self._load_curriculum_chart()
         self.academic_rules = self._load_academic_rules()
+        
+        # حد واحد هر بازه معدل، به ترتیب _GPA_THRESHOLDS
+        credit_rules = self.academic_rules.get("credit_limits", {})
+        self._credit_buckets = (
+            credit_rules.get("gpa_below_12", {"max_credits": 16, "min_credits": 14}),
+            credit_rules.get("gpa_12_to_15", {"max_credits": 18, "min_credits": 12}),
+            credit_rules.get("gpa_15_to_17", {"max_credits": 20, "min_credits": 12}),
+            credit_rules.get("gpa_17_plus", {"max_credits": 24, "min_credits": 12})
+        )
+        
+        # زیرساختارهای پرکاربرد چارت، یک‌بار استخراج می‌شوند
+        versions = self.curriculum_chart.get("curriculum_versions", {})
+        self._semesters_by_version: Dict[str, Dict[str, Any]] = {
+            version: versions.get(version, {}).get("semesters", {})
+            for version in ("post_1403", "pre_1403")
+        }
+        
+        # گرایش‌ها به صورت (نام، دروس، حداقل واحد) تا حلقه تحلیل به get نیاز نداشته باشد
+        self._tracks: Tuple[Tuple[str, FrozenSet[str], int], ...] = tuple(
+            (track.get("track_name", ""), track.get("courses", frozenset()), track.get("min_credits", 6))
+            for track in self.curriculum_chart.get("specialization_groups", {}).get("tracks", [])
+        )
+        
+        # فهرست مسطح (کد درس، پیش‌نیازها) برای هر نسخه چارت
+        self._prereq_index: Dict[str, List[Tuple[str, Tuple[str, ...]]]] = {
+            version: self._build_prereq_index(semesters)
+            for version, semesters in self._semesters_by_version.items()
+        }
+    
+    @staticmethod
+    def _build_prereq_index(semester_structure: Dict[str, Any]) -> List[Tuple[str, Tuple[str, ...]]]:
+        """استخراج (کد درس، پیش‌نیازها) از ساختار ترم‌ها"""
+        return [
+            (course["course_code"], tuple(course.get("prerequisites", [])))
+            for semester_data in semester_structure.values()
+            for course in semester_data.get("courses", [])
+        ]
     
     def _load_curriculum_chart(self) -> Dict[str, Any]:
-        """بارگذاری چارت‌های درسی از فایل‌های JSON"""
+        """بارگذاری چارت‌های درسی (کش‌شده در سطح ماژول)"""
         try:
-            data_path = Path(__file__).parent.parent.parent / "data"
-            
-            # بارگذاری چارت‌های درسی
-            with open(data_path / "curriculum_1403_onwards.json", 'r', encoding='utf-8') as f:
-                post_1403_chart = json.load(f)
-            
-            with open(data_path / "curriculum_before_1403.json", 'r', encoding='utf-8') as f:
-                pre_1403_chart = json.load(f)
-            
-            # ترکیب داده‌ها در ساختار مورد انتظار
-            return {
-                "curriculum_versions": {
-                    "post_1403": post_1403_chart,
-                    "pre_1403": pre_1403_chart
-                },
-                "academic_rules": {
-                    "credit_limits": {
-                        "gpa_17_plus": {"max_credits": 24, "min_credits": 12},
-                        "gpa_15_to_17": {"max_credits": 20, "min_credits": 12},
-                        "gpa_12_to_15": {"max_credits": 18, "min_credits": 12},
-                        "gpa_below_12": {"max_credits": 16, "min_credits": 14}
-                    }
-                },
-                "specialization_groups": post_1403_chart.get("specialization_tracks", {})
-            }
+            return _load_curriculum_bundle()
         except Exception as e:
             logger.error(f"Error loading curriculum charts: {e}")
             return {}
@@ -79,68 +239,121 @@ class StudentAnalyzer:
         """استخراج قوانین تحصیلی از چارت درسی"""
         return self.curriculum_chart.get("academic_rules", {})
     
-    async def analyze_student_status(self, student_id: int) -> StudentAcademicStatus:
-        """تجزیه کامل وضعیت تحصیلی دانشجو"""
+    async def analyze_student_status(
+        self,
+        student_id: int,
+        db: Optional[AsyncSession] = None
+    ) -> StudentAcademicStatus:
+        """تجزیه کامل وضعیت تحصیلی دانشجو (با نشست فراخواننده در صورت وجود)"""
+        if db is not None:
+            return await self._analyze_with_session(db, student_id)
+        
         async with get_db() as db:
-            # دریافت اطلاعات دانشجو و نمرات
-            student = await self._get_student_with_grades(db, student_id)
-            if not student:
-                raise ValueError(f"Student {student_id} not found")
-            
-            # تعیین نسخه چارت درسی
-            curriculum_version = self._determine_curriculum_version(student.entry_year)
-            
-            # محاسبه GPA و واحدهای گذرانده شده
-            gpa, total_credits = self._calculate_gpa_and_credits(student.grades)
-            
-            # تعیین وضعیت تحصیلی
-            academic_standing = self._determine_academic_standing(gpa, student.grades)
-            
-            # شناسایی دروس مردودی و گذرانده شده
-            failed_courses = self._get_failed_courses(student.grades)
-            completed_courses = self._get_completed_courses(student.grades)
-            
-            # بررسی وضعیت پیش‌نیازها
-            prerequisite_status = self._check_prerequisite_status(completed_courses, curriculum_version)
-            
-            # بررسی وضعیت گرایش
-            specialization_status = self._analyze_specialization_status(completed_courses, student.current_semester)
-            
-            # محاسبه پیشرفت تحصیلی
-            graduation_progress = self._calculate_graduation_progress(
-                total_credits, completed_courses, curriculum_version
-            )
-            
-            # تعیین گروه (برای ورودی‌های ۱۴۰۳ به بعد)
-            group_assignment = self._determine_group_assignment(student.entry_year, student.student_number)
-            
-            return StudentAcademicStatus(
-                student_id=student_id,
-                current_gpa=gpa,
-                total_credits_passed=total_credits,
-                academic_standing=academic_standing,
-                entry_year=student.entry_year,
-                current_semester=student.current_semester,
-                curriculum_version=curriculum_version,
-                group_assignment=group_assignment,
-                failed_courses=failed_courses,
-                completed_courses=completed_courses,
-                prerequisite_status=prerequisite_status,
-                specialization_status=specialization_status,
-                graduation_progress=graduation_progress
+            return await self._analyze_with_session(db, student_id)
+    
+    async def _analyze_with_session(self, db: AsyncSession, student_id: int) -> StudentAcademicStatus:
+        """تجزیه وضعیت تحصیلی دانشجو روی یک نشست دیتابیس"""
+        # در صورت عدم تغییر نمرات، نتیجه قبلی بازگردانده می‌شود
+        cache_key = await self._get_status_cache_key(db, student_id)
+        if cache_key is not None:
+            cached_status = _status_cache.get(cache_key)
+            if cached_status is not None:
+                # نسخه مستقل، تا تغییر فراخواننده کش را خراب نکند
+                return copy.deepcopy(cached_status)
+        
+        # دریافت اطلاعات دانشجو و نمرات
+        student = await self._get_student_with_grades(db, student_id)
+        if not student:
+            raise ValueError(f"Student {student_id} not found")
+        
+        # تعیین نسخه چارت درسی
+        curriculum_version = self._determine_curriculum_version(student.entry_year)
+        
+        # آخرین تلاش معتبر برای هر درس
+        latest = self._latest_attempts(student.grades)
+        
+        # محاسبه GPA و واحدهای گذرانده شده
+        gpa, total_credits = self._calculate_gpa_and_credits(latest.values())
+        
+        # تعیین وضعیت تحصیلی
+        academic_standing = self._determine_academic_standing(gpa, latest)
+        
+        # شناسایی دروس مردودی و گذرانده شده
+        failed_courses, completed_courses = self._partition_courses(latest)
+        completed_index = CompletedIndex.from_completed(completed_courses)
+        
+        # بررسی وضعیت پیش‌نیازها
+        prerequisite_status = self._check_prerequisite_status(completed_index, curriculum_version)
+        
+        # بررسی وضعیت گرایش
+        specialization_status = self._analyze_specialization_status(completed_index, student.current_semester)
+        
+        # محاسبه پیشرفت تحصیلی
+        graduation_progress = self._calculate_graduation_progress(
+            total_credits, completed_index, curriculum_version
+        )
+        
+        # تعیین گروه (برای ورودی‌های ۱۴۰۳ به بعد)
+        group_assignment = self._determine_group_assignment(student.entry_year, student.student_number)
+        
+        status = StudentAcademicStatus(
+            student_id=student_id,
+            current_gpa=gpa,
+            total_credits_passed=total_credits,
+            academic_standing=academic_standing,
+            entry_year=student.entry_year,
+            current_semester=student.current_semester,
+            curriculum_version=curriculum_version,
+            group_assignment=group_assignment,
+            failed_courses=[course.to_dict() for course in failed_courses],
+            completed_courses=[course.to_dict() for course in completed_courses],
+            prerequisite_status=prerequisite_status,
+            specialization_status=specialization_status,
+            graduation_progress=graduation_progress
+        )
+        
+        if cache_key is not None:
+            _status_cache[cache_key] = copy.deepcopy(status)
+        
+        return status
+    
+    async def _get_status_cache_key(self, db, student_id: int) -> Optional[Tuple[Any, ...]]:
+        """کلید کش وضعیت: زمان آخرین تغییر دانشجو و نمرات در یک کوئری سبک"""
+        try:
+            grades_filter = StudentGrade.student_id == student_id
+            result = await db.execute(
+                select(
+                    Student.updated_at,
+                    select(func.max(StudentGrade.updated_at)).where(grades_filter).scalar_subquery(),
+                    select(func.count(StudentGrade.id)).where(grades_filter).scalar_subquery()
+                )
+                .where(Student.id == student_id)
             )
+            row = result.one_or_none()
+        except Exception as e:
+            log.error("Error fetching status version for student %s: %s", student_id, e)
+            return None
+        
+        if row is None:
+            return None
+        return (student_id, *row)
     
     async def _get_student_with_grades(self, db, student_id: int) -> Optional[Student]:
         """دریافت دانشجو همراه با نمرات"""
         try:
             result = await db.execute(
                 select(Student)
-                .options(selectinload(Student.grades).selectinload(StudentGrade.course))
+                .options(
+                    # هر نمره دقیقاً یک درس دارد، پس درس در همان کوئری نمرات JOIN می‌شود
+                    selectinload(Student.grades).joinedload(StudentGrade.course),
+                    # جلوگیری از lazy load ناخواسته در مراحل بعدی تحلیل
+                    raiseload("*")
+                )
                 .where(Student.id == student_id)
             )
             return result.scalar_one_or_none()
         except Exception as e:
-            logger.error(f"Error fetching student {student_id}: {e}")
+            log.error("Error fetching student %s: %s", student_id, e, exc_info=True)
             return None
     
     def _determine_curriculum_version(self, entry_year: int) -> str:
@@ -150,143 +363,99 @@ class StudentAnalyzer:
         else:
             return "pre_1403"
     
-    def _calculate_gpa_and_credits(self, grades: List[StudentGrade]) -> Tuple[float, int]:
-        """محاسبه GPA و مجموع واحدهای گذرانده شده"""
-        total_points = 0.0
-        total_credits = 0
-        passed_credits = 0
-        
-        for grade_record in grades:
-            if grade_record.status not in ["passed", "confirmed"]:
-                continue
-                
-            course = grade_record.course
-            course_credits = course.theoretical_credits + course.practical_credits
-            grade_value = float(grade_record.grade)
-            
-            # فقط آخرین تلاش برای هر درس در نظر گرفته شود
-            if grade_value >= 10.0:  # قبولی
-                total_points += grade_value * course_credits
-                total_credits += course_credits
-                passed_credits += course_credits
-            else:  # مردودی
-                total_points += grade_value * course_credits
-                total_credits += course_credits
-        
-        gpa = total_points / total_credits if total_credits > 0 else 0.0
-        return round(gpa, 2), passed_credits
+    def _calculate_gpa_and_credits(self, latest_attempts: Iterable[LatestAttempt]) -> Tuple[float, int]:
+        """محاسبه GPA و مجموع واحدهای گذرانده شده (فقط آخرین تلاش هر درس)"""
+        grade_values = []
+        course_credits = []
+        for _, grade_value, credits in latest_attempts:
+            grade_values.append(grade_value)
+            course_credits.append(credits)
+        
+        return summarize_grades(grade_values, course_credits)
     
-    def _determine_academic_standing(self, gpa: float, grades: List[StudentGrade]) -> str:
-        """تعیین وضعیت تحصیلی بر اساس GPA و نمرات"""
-        rules = self.academic_rules.get("credit_limits", {})
+    def _determine_academic_standing(self, gpa: float, latest: Dict[str, LatestAttempt]) -> str:
+        """تعیین وضعیت تحصیلی بر اساس GPA و آخرین تلاش هر درس"""
+        bucket = bisect_right(_GPA_THRESHOLDS, gpa)
         
         # بررسی مشروطی بر اساس GPA کل
-        if gpa < 12.0:
+        if bucket == 0:
             return "probation"
         
-        # بررسی دروس مردودی در ترم جاری
+        # بررسی دروس مردودی (تلاش‌های ناموفق قبلیِ دروس پاس‌شده حساب نمی‌شوند)
         current_semester_failed = sum(
-            1 for grade in grades 
-            if grade.grade < 10.0 and grade.status == "confirmed"
+            1 for _, grade_value, _ in latest.values()
+            if grade_value < 10.0
         )
         
         if current_semester_failed > 2:
             return "probation"
         
         # وضعیت عادی یا عالی
-        if gpa >= 17.0:
-            return "excellent"
-        elif gpa >= 15.0:
-            return "good_standing"
-        else:
-            return "normal"
+        return _STANDING_BY_BUCKET[bucket]
     
-    def _get_failed_courses(self, grades: List[StudentGrade]) -> List[Dict[str, Any]]:
-        """شناسایی دروس مردودی"""
-        failed_courses = []
-        course_attempts = {}
+    def _latest_attempts(self, grades: List[StudentGrade]) -> Dict[str, LatestAttempt]:
+        """آخرین تلاش معتبر (غیر حذفی و دارای نمره) برای هر درس، در یک گذر"""
+        latest: Dict[str, StudentGrade] = {}
         
-        # گروه‌بندی بر اساس کد درس
         for grade in grades:
-            if grade.status != "confirmed":
+            if grade.status not in _COUNTED_STATUSES or grade.grade is None:
                 continue
-                
+            
             course_code = grade.course.course_code
-            if course_code not in course_attempts:
-                course_attempts[course_code] = []
-            course_attempts[course_code].append(grade)
+            prev = latest.get(course_code)
+            if prev is None or grade.attempt_number > prev.attempt_number:
+                latest[course_code] = grade
         
-        # بررسی آخرین وضعیت هر درس
-        for course_code, attempts in course_attempts.items():
-            latest_attempt = max(attempts, key=lambda g: g.attempt_number)
-            
-            if latest_attempt.grade < 10.0:  # مردودی
-                failed_courses.append({
-                    "course_code": course_code,
-                    "course_name": latest_attempt.course.course_name,
-                    "grade": latest_attempt.grade,
-                    "attempt_number": latest_attempt.attempt_number,
-                    "credits": latest_attempt.course.theoretical_credits + latest_attempt.course.practical_credits,
-                    "course_type": latest_attempt.course.course_type,
-                    "priority": "high"  # دروس مردودی اولویت بالا دارند
-                })
-        
-        return failed_courses
+        # نمره و واحد فقط برای تلاش‌های نهایی محاسبه می‌شوند
+        return {
+            course_code: (
+                grade,
+                float(grade.grade),
+                grade.course.theoretical_credits + grade.course.practical_credits
+            )
+            for course_code, grade in latest.items()
+        }
     
-    def _get_completed_courses(self, grades: List[StudentGrade]) -> List[Dict[str, Any]]:
-        """شناسایی دروس گذرانده شده"""
+    def _partition_courses(self, latest: Dict[str, LatestAttempt]) -> Tuple[List[CourseRecord], List[CourseRecord]]:
+        """شناسایی دروس مردودی و گذرانده شده از روی آخرین تلاش‌ها"""
+        failed_courses = []
         completed_courses = []
-        course_attempts = {}
-        
-        # گروه‌بندی بر اساس کد درس
-        for grade in grades:
-            if grade.status != "confirmed":
-                continue
-                
-            course_code = grade.course.course_code
-            if course_code not in course_attempts:
-                course_attempts[course_code] = []
-            course_attempts[course_code].append(grade)
         
         # بررسی آخرین وضعیت هر درس
-        for course_code, attempts in course_attempts.items():
-            latest_attempt = max(attempts, key=lambda g: g.attempt_number)
+        for course_code, (latest_attempt, grade_value, credits) in latest.items():
+            course = latest_attempt.course
             
-            if latest_attempt.grade >= 10.0:  # قبولی
-                completed_courses.append({
-                    "course_code": course_code,
-                    "course_name": latest_attempt.course.course_name,
-                    "grade": latest_attempt.grade,
-                    "credits": latest_attempt.course.theoretical_credits + latest_attempt.course.practical_credits,
-                    "course_type": latest_attempt.course.course_type,
-                    "semester_taken": latest_attempt.created_at.strftime("%Y-%m") if latest_attempt.created_at else "unknown"
-                })
-        
-        return completed_courses
-    
-    def _check_prerequisite_status(self, completed_courses: List[Dict], curriculum_version: str) -> Dict[str, bool]:
-        """بررسی وضعیت پیش‌نیازها"""
-        completed_codes = {course["course_code"] for course in completed_courses}
-        prerequisite_status = {}
-        
-        # دریافت لیست تمام دروس از چارت
-        curriculum = self.curriculum_chart.get("curriculum_versions", {}).get(curriculum_version, {})
-        semester_structure = curriculum.get("semesters", {})
+            if grade_value < 10.0:  # مردودی
+                failed_courses.append(CourseRecord(
+                    course_code=course_code,
+                    course_name=course.course_name,
+                    grade=grade_value,
+                    credits=credits,
+                    course_type=course.course_type,
+                    attempt_number=latest_attempt.attempt_number
+                ))
+            else:  # قبولی
+                completed_courses.append(CourseRecord(
+                    course_code=course_code,
+                    course_name=course.course_name,
+                    grade=grade_value,
+                    credits=credits,
+                    course_type=course.course_type,
+                    semester_taken=latest_attempt.created_at.strftime("%Y-%m") if latest_attempt.created_at else "unknown"
+                ))
         
-        for semester_num, semester_data in semester_structure.items():
-            mandatory_courses = semester_data.get("courses", [])
-            
-            for course in mandatory_courses:
-                course_code = course["course_code"]
-                prerequisites = course.get("prerequisites", [])
-                
-                # بررسی تمام پیش‌نیازها
-                all_met = all(prereq in completed_codes for prereq in prerequisites)
-                prerequisite_status[course_code] = all_met
-        
-        return prerequisite_status
+        return failed_courses, completed_courses
     
-    def _analyze_specialization_status(self, completed_courses: List[Dict], current_semester: int) -> Dict[str, Any]:
+    def _check_prerequisite_status(self, completed: CompletedIndex, curriculum_version: str) -> Dict[str, bool]:
+        """بررسی وضعیت پیش‌نیازها (فقط برای دروسی که هنوز گذرانده نشده‌اند)"""
+        completed_codes = completed.codes
+        return {
+            course_code: completed_codes.issuperset(prerequisites)
+            for course_code, prerequisites in self._prereq_index.get(curriculum_version, [])
+            if course_code not in completed_codes  # درس گذرانده شده، پیش‌نیاز بی‌اهمیت است
+        }
+    
+    def _analyze_specialization_status(self, completed: CompletedIndex, current_semester: int) -> Dict[str, Any]:
         """تجزیه وضعیت گرایش تخصصی"""
         specialization_status = {
             "selection_allowed": current_semester >= 5,
@@ -296,56 +465,38 @@ class StudentAnalyzer:
         }
         
         # محاسبه واحدهای تخصصی گذرانده شده از هر گرایش
-        specialization_data = self.curriculum_chart.get("specialization_groups", {})
-        tracks = specialization_data.get("tracks", [])
+        credits_by_code = completed.credits_by_code
+        progress_by_group = specialization_status["progress_by_group"]
         
-        for track in tracks:
-            track_name = track.get("track_name", "")
-            track_courses = track.get("courses", [])
-            min_credits = track.get("min_credits", 6)
-            
-            track_credits = 0
-            
-            for course in completed_courses:
-                # بررسی اینکه آیا این درس جزو این گرایش است
-                if course["course_code"] in track_courses:
-                    track_credits += course["credits"]
+        # بیشترین واحد در همان حلقه نگه داشته می‌شود (اولین گرایش در حالت تساوی)
+        best_group, best_credits = None, -1
+        
+        for track_name, track_courses, min_credits in self._tracks:
+            track_credits = sum(credits_by_code[code] for code in track_courses & completed.codes)
             
-            specialization_status["progress_by_group"][track_name] = {
+            progress_by_group[track_name] = {
                 "credits_completed": track_credits,
                 "persian_name": track_name,
                 "minimum_required": min_credits,
                 "is_sufficient": track_credits >= min_credits
             }
+            
+            if track_credits > best_credits:
+                best_group, best_credits = track_name, track_credits
         
         # تعیین گرایش انتخابی (بیشترین تعداد واحد)
-        if specialization_status["progress_by_group"]:
-            max_group = max(
-                specialization_status["progress_by_group"].items(),
-                key=lambda x: x[1]["credits_completed"]
-            )
-            if max_group[1]["credits_completed"] >= 3:  # حداقل 3 واحد
-                specialization_status["selected_group"] = max_group[0]
-                specialization_status["completed_specialized_credits"] = max_group[1]["credits_completed"]
+        if best_credits >= 3:  # حداقل 3 واحد
+            specialization_status["selected_group"] = best_group
+            specialization_status["completed_specialized_credits"] = best_credits
         
         return specialization_status
     
-    def _calculate_graduation_progress(self, passed_credits: int, completed_courses: List[Dict], curriculum_version: str) -> Dict[str, Any]:
+    def _calculate_graduation_progress(self, passed_credits: int, completed: CompletedIndex, curriculum_version: str) -> Dict[str, Any]:
         """محاسبه پیشرفت تحصیلی"""
         total_required = 140  # مجموع واحدهای مورد نیاز
         
         # تفکیک واحدها بر اساس نوع درس
-        credits_by_type = {
-            "foundation": 0,
-            "core": 0,
-            "specialized": 0,
-            "general": 0
-        }
-        
-        for course in completed_courses:
-            course_type = course.get("course_type", "general")
-            if course_type in credits_by_type:
-                credits_by_type[course_type] += course["credits"]
+        credits_by_type = dict(zip(COURSE_TYPES, completed.credits_by_type))
         
         # محاسبه درصد پیشرفت
         progress_percentage = (passed_credits / total_required) * 100
@@ -377,24 +528,17 @@ class StudentAnalyzer:
         
         # الگوریتم ساده برای تعیین گروه بر اساس شماره دانشجویی
         # در پیاده‌سازی واقعی، این اطلاعات باید از دیتابیس یا فایل مجزا آمده باشد
-        try:
-            last_digit = int(student_number[-1])
-            return "A" if last_digit % 2 == 0 else "B"
-        except (ValueError, IndexError):
+        last_char = student_number[-1:] if student_number else ""
+        if not last_char.isdecimal():
             return "A"  # پیش‌فرض
+        
+        # بازه ارقام یونیکد (لاتین، فارسی، عربی و ...) از کد زوج شروع می‌شود،
+        # پس زوجیت کد کاراکتر همان زوجیت رقم است
+        return "A" if ord(last_char) & 1 == 0 else "B"
     
     def get_credit_limit(self, gpa: float) -> Dict[str, int]:
         """محاسبه حد مجاز واحد بر اساس معدل"""
-        rules = self.academic_rules.get("credit_limits", {})
-        
-        if gpa >= 17.0:
-            return rules.get("gpa_17_plus", {"max_credits": 24, "min_credits": 12})
-        elif gpa >= 15.0:
-            return rules.get("gpa_15_to_17", {"max_credits": 20, "min_credits": 12})
-        elif gpa >= 12.0:
-            return rules.get("gpa_12_to_15", {"max_credits": 18, "min_credits": 12})
-        else:
-            return rules.get("gpa_below_12", {"max_credits": 16, "min_credits": 14})
+        return self._credit_buckets[bisect_right(_GPA_THRESHOLDS, gpa)]
     
     def analyze_course_recommendations_context(self, status: StudentAcademicStatus) -> Dict[str, Any]:
         """تجزیه کامل برای سیستم پیشنهاد دروس"""
@@ -5,11 +5,58 @@ This module provides functions to load and work with curriculum data
 from JSON files organized by entry year.
 """
 
-import json
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any, Tuple
+import unicodedata
+import orjson
 from loguru import logger
 
+# Single-pass replacements applied when normalizing course names
+_NORM_TABLE = str.maketrans({
+    '_': ' ',
+    '-': ' ',
+    'ي': 'ی',  # Arabic yeh -> Persian yeh
+    'ك': 'ک',  # Arabic kaf -> Persian keheh
+})
+
+
+@dataclass(slots=True, frozen=True)
+class CourseInfo:
+    """
+    A course from a curriculum file, flattened once when the curriculum is loaded.
+    
+    Instances are shared between callers, hence immutable. Item access and
+    get() mirror the dictionaries this replaces for callers not yet migrated
+    to attribute access.
+    """
+    course_code: str
+    course_name: str
+    theoretical_credits: int
+    practical_credits: int
+    course_type: str
+    is_mandatory: bool
+    prerequisites: Tuple[str, ...]
+    semester_recommended: Optional[int]
+    elective_group: Optional[str] = None
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Course as a plain dictionary (elective_group only for elective courses)"""
+        data = {key: getattr(self, key) for key in self.__slots__}
+        if self.elective_group is None:
+            del data["elective_group"]
+        return data
+
 
 class CurriculumManager:
     """
@@ -26,65 +73,84 @@ class CurriculumManager:
             data_dir: Directory containing curriculum JSON files
         """
         self.data_dir = Path(data_dir)
-        self._curricula: Dict[int, Dict[str, Any]] = {}
-        self._course_mappings: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        # Parsed curriculum per entry year, with the file's mtime at parse time
+        self._curricula: Dict[int, Tuple[int, Dict[str, Any]]] = {}
+        self._course_mappings: Dict[int, Dict[str, CourseInfo]] = {}
+        self._available_years: Optional[List[int]] = None
+        # Normalized course names per entry year: exact-match index and
+        # (normalized name, course code) pairs in mapping order for partial matches
+        self._name_index: Dict[int, Dict[str, str]] = {}
+        self._normalized_names: Dict[int, List[Tuple[str, str]]] = {}
+        # Bumped on every (re)build, so memoized lookups keyed on it go stale
+        self.generation = 0
         
     def load_curriculum(self, entry_year: int) -> Optional[Dict[str, Any]]:
         """
         Load curriculum data for a specific entry year.
         
+        A cached curriculum is revalidated with a single stat and only
+        re-parsed (and its course mapping rebuilt) when the file changed.
+        
         Args:
             entry_year: The entry year (e.g., 1403, 1393)
             
         Returns:
             Curriculum data dictionary or None if not found
         """
-        if entry_year in self._curricula:
-            return self._curricula[entry_year]
-            
         file_path = self.data_dir / f"entry_{entry_year}.json"
         
-        if not file_path.exists():
+        # Years without a file are rejected from the cached directory listing, without a stat
+        if entry_year not in self.get_available_years():
             logger.warning(f"Curriculum file not found: {file_path}")
             return None
-            
+        
+        cached = self._curricula.get(entry_year)
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                curriculum_data = json.load(f)
+            mtime_ns = file_path.stat().st_mtime_ns
+            if cached and cached[0] == mtime_ns:
+                return cached[1]
+            
+            curriculum_data = orjson.loads(file_path.read_bytes())
                 
-            self._curricula[entry_year] = curriculum_data
+            self._curricula[entry_year] = (mtime_ns, curriculum_data)
             self._build_course_mapping(entry_year, curriculum_data)
             
-            logger.info(f"Loaded curriculum for entry year {entry_year}")
+            logger.info(f"{'Reloaded' if cached else 'Loaded'} curriculum for entry year {entry_year}")
             return curriculum_data
             
         except Exception as e:
             logger.error(f"Error loading curriculum for {entry_year}: {e}")
-            return None
+            # Keep serving the last good parse rather than dropping the curriculum
+            return cached[1] if cached else None
     
     def _build_course_mapping(self, entry_year: int, curriculum_data: Dict[str, Any]) -> None:
         """
         Build a flat course mapping from curriculum data for fast lookup.
         
+        Each course becomes an immutable CourseInfo that the lookup methods
+        return as-is.
+        
         Args:
             entry_year: Entry year
             curriculum_data: Curriculum data dictionary
         """
-        course_mapping = {}
+        course_mapping: Dict[str, CourseInfo] = {}
         
         # Add courses from semesters
         for semester_data in curriculum_data.get("semesters", {}).values():
             for course in semester_data.get("courses", []):
                 course_code = course["course_code"]
-                course_mapping[course_code] = {
-                    "course_name": course["course_name"],
-                    "theoretical_credits": course["theoretical_credits"],
-                    "practical_credits": course["practical_credits"],
-                    "course_type": course["course_type"],
-                    "is_mandatory": course["is_mandatory"],
-                    "prerequisites": course["prerequisites"],
-                    "semester_recommended": semester_data["semester"]
-                }
+                course_mapping[course_code] = CourseInfo(
+                    course_code=course_code,
+                    course_name=course["course_name"],
+                    theoretical_credits=course["theoretical_credits"],
+                    practical_credits=course["practical_credits"],
+                    course_type=course["course_type"],
+                    is_mandatory=course["is_mandatory"],
+                    prerequisites=tuple(course["prerequisites"]),
+                    semester_recommended=semester_data["semester"]
+                )
         
         # Add elective courses
         for group_type, groups in curriculum_data.get("elective_groups", {}).items():
@@ -92,21 +158,53 @@ class CurriculumManager:
                 for course in group.get("courses", []):
                     course_code = course["course_code"]
                     if course_code not in course_mapping:  # Don't override semester courses
-                        course_mapping[course_code] = {
-                            "course_name": course["course_name"],
-                            "theoretical_credits": course["credits"]["theoretical"],
-                            "practical_credits": course["credits"]["practical"],
-                            "course_type": "specialized" if group_type == "specialized" else "general",
-                            "is_mandatory": False,
-                            "prerequisites": [],
-                            "semester_recommended": None,
-                            "elective_group": group["group_name"]
-                        }
+                        course_mapping[course_code] = CourseInfo(
+                            course_code=course_code,
+                            course_name=course["course_name"],
+                            theoretical_credits=course["credits"]["theoretical"],
+                            practical_credits=course["credits"]["practical"],
+                            course_type="specialized" if group_type == "specialized" else "general",
+                            is_mandatory=False,
+                            prerequisites=(),
+                            semester_recommended=None,
+                            elective_group=group["group_name"]
+                        )
         
         self._course_mappings[entry_year] = course_mapping
+        
+        # Normalize every course name once, keeping the first course for duplicate names
+        normalized_names = [
+            (self._normalize_name(course_info.course_name), course_code)
+            for course_code, course_info in course_mapping.items()
+        ]
+        name_index: Dict[str, str] = {}
+        for normalized, course_code in normalized_names:
+            name_index.setdefault(normalized, course_code)
+        
+        self._normalized_names[entry_year] = normalized_names
+        self._name_index[entry_year] = name_index
+        
+        self.generation += 1
         logger.debug(f"Built course mapping for {entry_year}: {len(course_mapping)} courses")
     
-    def get_course_info(self, course_code: str, entry_year: int) -> Optional[Dict[str, Any]]:
+    def _get_course_mapping(self, entry_year: int) -> Optional[Dict[str, CourseInfo]]:
+        """
+        Get the course mapping for an entry year, revalidated against its file.
+        
+        Every lookup goes through here, so an edited curriculum file is
+        picked up (at the cost of one stat per lookup) without a restart.
+        
+        Args:
+            entry_year: Entry year
+            
+        Returns:
+            Course code to CourseInfo mapping or None if the curriculum is unavailable
+        """
+        if self.load_curriculum(entry_year) is None:
+            return None
+        return self._course_mappings[entry_year]
+    
+    def get_course_info(self, course_code: str, entry_year: int) -> Optional[CourseInfo]:
         """
         Get course information by course code and entry year.
         
@@ -115,21 +213,71 @@ class CurriculumManager:
             entry_year: Student's entry year
             
         Returns:
-            Course information dictionary or None if not found
-        """
-        if entry_year not in self._course_mappings:
-            if not self.load_curriculum(entry_year):
-                # Try to find the closest available curriculum
-                fallback_year = self._find_closest_curriculum(entry_year)
-                if fallback_year and self.load_curriculum(fallback_year):
-                    logger.info(f"Using curriculum {fallback_year} as fallback for entry year {entry_year}")
-                    entry_year = fallback_year
-                else:
-                    return None
-                
-        course_mapping = self._course_mappings[entry_year]
+            Course information or None if not found
+        """
+        course_mapping = self._get_course_mapping_with_fallback(entry_year)
+        if course_mapping is None:
+            return None
+        
         return course_mapping.get(course_code)
     
+    def _get_course_mapping_with_fallback(self, entry_year: int) -> Optional[Dict[str, CourseInfo]]:
+        """
+        Get the course mapping for an entry year, or for the closest available one.
+        
+        Args:
+            entry_year: Student's entry year
+            
+        Returns:
+            Course code to CourseInfo mapping or None if no curriculum is available
+        """
+        course_mapping = self._get_course_mapping(entry_year)
+        if course_mapping is None:
+            # Try to find the closest available curriculum
+            fallback_year = self._find_closest_curriculum(entry_year)
+            course_mapping = self._get_course_mapping(fallback_year) if fallback_year else None
+            if course_mapping is not None:
+                logger.info(f"Using curriculum {fallback_year} as fallback for entry year {entry_year}")
+        
+        return course_mapping
+    
+    def revalidate(self, entry_year: int) -> int:
+        """
+        Revalidate the curriculum used for an entry year against its file.
+        
+        Args:
+            entry_year: Student's entry year
+            
+        Returns:
+            Current generation, to key memoized lookups on
+        """
+        self._get_course_mapping_with_fallback(entry_year)
+        return self.generation
+    
+    def get_available_years(self, refresh: bool = False) -> List[int]:
+        """
+        Get the entry years that have a curriculum file.
+        
+        The data directory is scanned once; later calls reuse the cached list.
+        
+        Args:
+            refresh: Rescan the directory to pick up added or removed files
+        
+        Returns:
+            Sorted list of available entry years
+        """
+        if self._available_years is None or refresh:
+            available_years = []
+            for file_path in self.data_dir.glob("entry_*.json"):
+                try:
+                    available_years.append(int(file_path.stem.split("_")[1]))
+                except (ValueError, IndexError) as e:
+                    logger.warning(f"Invalid curriculum filename: {file_path} - {e}")
+            
+            self._available_years = sorted(available_years)
+        
+        return self._available_years
+    
     def _find_closest_curriculum(self, entry_year: int) -> Optional[int]:
         """
         Find the closest available curriculum year.
@@ -140,26 +288,19 @@ class CurriculumManager:
         Returns:
             Closest available entry year or None
         """
-        # Check what curriculum files we have
-        available_years = []
-        for file_path in self.data_dir.glob("entry_*.json"):
-            try:
-                year = int(file_path.stem.split("_")[1])
-                available_years.append(year)
-            except (ValueError, IndexError):
-                continue
-        
+        available_years = self.get_available_years()
         if not available_years:
             return None
             
-        # Find the closest year
-        available_years.sort()
-        closest_year = min(available_years, key=lambda x: abs(x - entry_year))
+        # Only the neighbours around the insertion point can be closest;
+        # ties resolve to the earlier year as the list is sorted
+        i = bisect_left(available_years, entry_year)
+        closest_year = min(available_years[max(0, i - 1):i + 1], key=lambda x: abs(x - entry_year))
         
         logger.debug(f"Available curricula: {available_years}, closest to {entry_year}: {closest_year}")
         return closest_year
     
-    def find_course_by_name(self, course_name: str, entry_year: int) -> Optional[Dict[str, Any]]:
+    def find_course_by_name(self, course_name: str, entry_year: int) -> Optional[CourseInfo]:
         """
         Find course by name (fuzzy matching).
         
@@ -170,34 +311,42 @@ class CurriculumManager:
         Returns:
             Course information with course_code or None if not found
         """
-        if entry_year not in self._course_mappings:
-            if not self.load_curriculum(entry_year):
-                return None
-                
-        course_mapping = self._course_mappings[entry_year]
+        course_mapping = self._get_course_mapping(entry_year)
+        if course_mapping is None:
+            return None
         
         # Normalize input for comparison
-        normalized_input = course_name.strip().replace('_', ' ').replace('-', ' ').lower()
+        normalized_input = self._normalize_name(course_name.strip())
         
         # Try exact match first
-        for course_code, course_info in course_mapping.items():
-            course_name_normalized = course_info["course_name"].replace('_', ' ').replace('-', ' ').lower()
-            if normalized_input == course_name_normalized:
-                result = course_info.copy()
-                result["course_code"] = course_code
-                return result
+        course_code = self._name_index[entry_year].get(normalized_input)
         
         # Try partial match
-        for course_code, course_info in course_mapping.items():
-            course_name_normalized = course_info["course_name"].replace('_', ' ').replace('-', ' ').lower()
-            if normalized_input in course_name_normalized or course_name_normalized in normalized_input:
-                result = course_info.copy()
-                result["course_code"] = course_code
-                return result
-                
-        return None
+        if course_code is None:
+            for course_name_normalized, candidate_code in self._normalized_names[entry_year]:
+                if normalized_input in course_name_normalized or course_name_normalized in normalized_input:
+                    course_code = candidate_code
+                    break
+            else:
+                return None
+        
+        return course_mapping[course_code]
+    
+    @staticmethod
+    def _normalize_name(course_name: str) -> str:
+        """
+        Normalize a course name for comparison.
+        
+        Args:
+            course_name: Persian or English course name
+            
+        Returns:
+            NFKC-normalized, lowercased name with underscores and hyphens
+            replaced by spaces and Arabic letter forms mapped to Persian
+        """
+        return unicodedata.normalize('NFKC', course_name).translate(_NORM_TABLE).lower()
     
-    def get_available_courses(self, entry_year: int, semester: Optional[int] = None) -> List[Dict[str, Any]]:
+    def get_available_courses(self, entry_year: int, semester: Optional[int] = None) -> List[CourseInfo]:
         """
         Get list of available courses for an entry year and optional semester.
         
@@ -206,22 +355,19 @@ class CurriculumManager:
             semester: Optional semester filter
             
         Returns:
-            List of course dictionaries with course_code included
+            List of courses
         """
-        if entry_year not in self._course_mappings:
-            if not self.load_curriculum(entry_year):
-                return []
-                
-        course_mapping = self._course_mappings[entry_year]
-        courses = []
-        
-        for course_code, course_info in course_mapping.items():
-            if semester is None or course_info.get("semester_recommended") == semester:
-                result = course_info.copy()
-                result["course_code"] = course_code
-                courses.append(result)
-                
-        return courses
+        course_mapping = self._get_course_mapping(entry_year)
+        if course_mapping is None:
+            return []
+        
+        if semester is None:
+            return list(course_mapping.values())
+        
+        return [
+            course_info for course_info in course_mapping.values()
+            if course_info.semester_recommended == semester
+        ]
     
     def get_graduation_requirements(self, entry_year: int) -> Optional[Dict[str, Any]]:
         """
@@ -238,13 +384,13 @@ class CurriculumManager:
             return curriculum.get("graduation_requirements")
         return None
     
-    def validate_prerequisites(self, course_code: str, completed_courses: List[str], entry_year: int) -> bool:
+    def validate_prerequisites(self, course_code: str, completed_courses: Iterable[str], entry_year: int) -> bool:
         """
         Check if a student has completed prerequisites for a course.
         
         Args:
             course_code: Target course code
-            completed_courses: List of completed course codes
+            completed_courses: Completed course codes
             entry_year: Student's entry year
             
         Returns:
@@ -254,100 +400,249 @@ class CurriculumManager:
         if not course_info:
             return False
             
-        prerequisites = course_info.get("prerequisites", [])
-        return all(prereq in completed_courses for prereq in prerequisites)
+        return frozenset(completed_courses).issuperset(course_info.prerequisites)
+    
+    def validate_prerequisites_bulk(self, course_codes: Iterable[str], completed_courses: Iterable[str],
+                                    entry_year: int) -> Dict[str, bool]:
+        """
+        Check prerequisites for several courses against one set of completed courses.
+        
+        Args:
+            course_codes: Target course codes
+            completed_courses: Completed course codes
+            entry_year: Student's entry year
+            
+        Returns:
+            Mapping of course code to whether its prerequisites are met
+        """
+        completed = frozenset(completed_courses)
+        results = {}
+        
+        for course_code in course_codes:
+            course_info = self.get_course_info(course_code, entry_year)
+            results[course_code] = bool(course_info) and completed.issuperset(course_info.prerequisites)
+        
+        return results
 
 
 # Global instance for easy access
 curriculum_manager = CurriculumManager()
 
 
-def get_course_info_by_code_or_name(identifier: str, entry_year: int) -> Optional[Dict[str, Any]]:
+def get_course_info_by_code_or_name(identifier: str, entry_year: int) -> Optional[CourseInfo]:
     """
     Get course info by code or name (convenience function).
     
+    The curriculum is revalidated before the memo is consulted: an edited
+    file is re-parsed, which bumps the manager's generation and so misses
+    every result memoized from the previous parse. CourseInfo is immutable,
+    so sharing memoized results between callers is safe.
+    
+    Args:
+        identifier: Course code or course name
+        entry_year: Student's entry year
+        
+    Returns:
+        Course information or None
+    """
+    generation = curriculum_manager.revalidate(entry_year)
+    return _lookup_course_info(curriculum_manager, generation, identifier, entry_year)
+
+
+@lru_cache(maxsize=4096)
+def _lookup_course_info(manager: CurriculumManager, generation: int,
+                        identifier: str, entry_year: int) -> Optional[CourseInfo]:
+    """
+    Look up a course by code, then by name (memoized).
+    
     Args:
+        manager: Curriculum manager (part of the memo key)
+        generation: Manager generation the lookup is valid for (part of the memo key)
         identifier: Course code or course name
         entry_year: Student's entry year
         
     Returns:
-        Course information dictionary or None
+        Course information or None
     """
     # Try as course code first
-    course_info = curriculum_manager.get_course_info(identifier, entry_year)
-    if course_info:
-        course_info["course_code"] = identifier
-        return course_info
+    course_info = manager.get_course_info(identifier, entry_year)
     
     # Try as course name
-    return curriculum_manager.find_course_by_name(identifier, entry_year)
+    if not course_info:
+        course_info = manager.find_course_by_name(identifier, entry_year)
+    
+    return course_info
+
+
+class _NameMappingIndex:
+    """
+    Course name mappings indexed for substring lookup.
+    
+    Mapping names are bucketed by length, longest first, so the longest
+    name contained in a query is found by probing the query's substrings
+    instead of testing every mapping name against the query.
+    """
+    
+    def __init__(self, mappings: Dict[str, str]):
+        """
+        Build the index.
+        
+        Args:
+            mappings: Course name to course code, in file order
+        """
+        self.mappings = mappings
+        
+        # name length -> {name: (position in file, code)}
+        buckets: Dict[int, Dict[str, Tuple[int, str]]] = {}
+        for position, (mapping_name, code) in enumerate(mappings.items()):
+            if mapping_name:
+                buckets.setdefault(len(mapping_name), {})[mapping_name] = (position, code)
+        
+        self._by_length = sorted(buckets.items(), reverse=True)
+    
+    def longest_contained(self, text: str) -> Optional[str]:
+        """
+        Find the longest mapping name contained in text.
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            Code of the longest contained name (earliest in file on ties) or None
+        """
+        for length, names in self._by_length:
+            if length > len(text):
+                continue
+            
+            hits = [
+                names[text[start:start + length]]
+                for start in range(len(text) - length + 1)
+                if text[start:start + length] in names
+            ]
+            if hits:
+                return min(hits)[1]
+        
+        return None
+
+
+# Course name mappings file and (file mtime, parsed index) of its last
+# successful load; the mtime is None while the file is missing
+_NAME_MAPPINGS_PATH = Path("data/course_name_mappings.json")
+_name_mapping_state: Optional[Tuple[Optional[int], _NameMappingIndex]] = None
+
+
+def _get_name_mapping_index() -> Optional[_NameMappingIndex]:
+    """
+    Get the indexed course name mappings, revalidated against the file.
+    
+    Costs one stat per call; the file is only re-parsed when it changed.
+    
+    Returns:
+        Name mapping index (empty if the file is missing), the last good
+        index if the file cannot be parsed, or None if it never could be
+    """
+    global _name_mapping_state
+    
+    try:
+        mtime_ns: Optional[int] = _NAME_MAPPINGS_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = None
+    
+    if _name_mapping_state is not None and _name_mapping_state[0] == mtime_ns:
+        return _name_mapping_state[1]
+    
+    if mtime_ns is None:
+        logger.warning(f"Course name mappings not found: {_NAME_MAPPINGS_PATH}")
+        _name_mapping_state = (None, _NameMappingIndex({}))
+        return _name_mapping_state[1]
+    
+    try:
+        data = orjson.loads(_NAME_MAPPINGS_PATH.read_bytes())
+    except Exception as e:
+        logger.error(f"Error loading course name mappings: {e}")
+        return _name_mapping_state[1] if _name_mapping_state else None
+    
+    _name_mapping_state = (mtime_ns, _NameMappingIndex(data.get("course_name_mappings", {})))
+    return _name_mapping_state[1]
 
 
 def get_course_code_by_name(course_name: str) -> Optional[str]:
     """
     Get course code by name using name mappings.
     
+    The mappings file is revalidated before the memo is consulted; matches
+    are memoized per loaded index, so an edited or fixed file is picked up
+    on the next call.
+    
     Args:
         course_name: Persian course name
         
     Returns:
         Course code or None if not found
     """
-    mappings_file = Path("data/course_name_mappings.json")
-    if not mappings_file.exists():
+    name_index = _get_name_mapping_index()
+    if name_index is None:
         return None
+    
+    return _match_course_code(name_index, course_name)
+
+
+@lru_cache(maxsize=4096)
+def _match_course_code(name_index: _NameMappingIndex, course_name: str) -> Optional[str]:
+    """
+    Match a course name against the loaded name mappings (memoized).
+    
+    Args:
+        name_index: Loaded name mapping index (part of the memo key)
+        course_name: Persian course name
         
-    try:
-        with open(mappings_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            mappings = data.get("course_name_mappings", {})
-            
-        # Direct match
-        if course_name in mappings:
-            return mappings[course_name]
-            
-        # Fuzzy match with priority (exact substring match first)
-        course_name_clean = course_name.strip()
-        
-        # First try exact substring matches
-        for mapping_name, code in mappings.items():
-            if course_name_clean == mapping_name:
-                return code
-        
-        # Then try partial matches, but prefer longer matches
-        best_match = None
-        best_length = 0
-        for mapping_name, code in mappings.items():
-            if mapping_name in course_name_clean:
-                if len(mapping_name) > best_length:
-                    best_match = code
-                    best_length = len(mapping_name)
-        
-        if best_match:
-            return best_match
-            
-        # Finally try reverse matches (course name contains mapping)
-        for mapping_name, code in mappings.items():
-            if course_name_clean in mapping_name:
-                return code
-                
-        return None
+    Returns:
+        Course code or None if not found
+    """
+    mappings = name_index.mappings
+    
+    # Direct match
+    if course_name in mappings:
+        return mappings[course_name]
         
-    except Exception as e:
-        logger.error(f"Error loading course name mappings: {e}")
-        return None
+    # Fuzzy match with priority (exact match on the stripped name first)
+    course_name_clean = course_name.strip()
+    if course_name_clean in mappings:
+        return mappings[course_name_clean]
+    
+    # Then try partial matches, but prefer longer matches
+    best_match = name_index.longest_contained(course_name_clean)
+    if best_match:
+        return best_match
+        
+    # Finally try reverse matches (course name contains mapping)
+    for mapping_name, code in mappings.items():
+        if course_name_clean in mapping_name:
+            return code
+            
+    return None
 
 
-def load_all_curricula() -> None:
-    """Load all available curriculum files."""
-    data_dir = Path("data/curriculum")
-    if not data_dir.exists():
-        logger.warning(f"Curriculum directory not found: {data_dir}")
-        return
-    
-    for file_path in data_dir.glob("entry_*.json"):
-        try:
-            entry_year = int(file_path.stem.split("_")[1])
-            curriculum_manager.load_curriculum(entry_year)
-        except (ValueError, IndexError) as e:
-            logger.warning(f"Invalid curriculum filename: {file_path} - {e}")
\ No newline at end of file
+def load_all_curricula() -> int:
+    """
+    Preload all available curriculum files into the global manager.
+    
+    Called at startup so the first lookups do not pay for the parse.
+    Calling it again picks up added curriculum files and re-parses only
+    the files modified since they were loaded.
+    
+    Returns:
+        Number of curricula loaded
+    """
+    if not curriculum_manager.data_dir.exists():
+        logger.warning(f"Curriculum directory not found: {curriculum_manager.data_dir}")
+        return 0
+    
+    # Rescan so files added since the last call are loaded too
+    loaded = sum(
+        curriculum_manager.load_curriculum(entry_year) is not None
+        for entry_year in curriculum_manager.get_available_years(refresh=True)
+    )
+    if not loaded:
+        logger.warning(f"No curricula loaded from {curriculum_manager.data_dir}")
+    return loaded
@@ -6,15 +6,51 @@ user session state with PostgreSQL persistence.
 """
 
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, Optional, List
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, and_
+from sqlalchemy import select, delete, update, and_, case, func, literal, Text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert as pg_insert
 from sqlalchemy.exc import IntegrityError, NoResultFound
 from loguru import logger
 
 from app.models.session import UserSession
 
 
+def _merge_session_data(patch: Dict[str, Any]):
+    """
+    Build a server-side shallow merge of patch into session_data.
+    
+    Args:
+        patch: Keys and values to merge into the stored session data
+        
+    Returns:
+        SQL expression evaluating to the merged JSONB document
+    """
+    return func.coalesce(UserSession.session_data, literal({}, JSONB)).op("||", return_type=JSONB)(
+        literal(patch, JSONB)
+    )
+
+
+def _set_session_data_key(key: str, value: Any):
+    """
+    Build a server-side patch of a single session_data key.
+    
+    Args:
+        key: Data key to set
+        value: Value to store (must be JSON-serializable)
+        
+    Returns:
+        SQL expression evaluating to the patched JSONB document
+    """
+    return func.jsonb_set(
+        func.coalesce(UserSession.session_data, literal({}, JSONB)),
+        literal([key], ARRAY(Text)),
+        literal(value, JSONB),
+        True,
+        type_=JSONB
+    )
+
+
 class DatabaseSessionManager:
     """
     Manages user sessions with database persistence.
@@ -32,25 +68,35 @@ class DatabaseSessionManager:
         """
         self.default_expiry_minutes = default_expiry_minutes
     
-    async def get_session(self, db: AsyncSession, telegram_user_id: int) -> Optional[UserSession]:
+    async def get_session(self, db: AsyncSession, telegram_user_id: int,
+                         for_update: bool = False, skip_locked: bool = False) -> Optional[UserSession]:
         """
         Get active session for a user.
         
         Args:
             db: Database session
             telegram_user_id: Telegram user ID
+            for_update: Lock the row until the transaction ends (SELECT ... FOR UPDATE)
+            skip_locked: With for_update, return None instead of waiting when
+                another worker holds the lock
             
         Returns:
             UserSession if found and not expired, None otherwise
         """
         try:
-            result = await db.execute(
-                select(UserSession)
+            # Expiry is evaluated by the database alongside the row
+            stmt = (
+                select(UserSession, (UserSession.expires_at <= func.now()).label("is_expired"))
                 .where(UserSession.telegram_user_id == telegram_user_id)
             )
-            session = result.scalar_one_or_none()
+            if for_update:
+                stmt = stmt.with_for_update(skip_locked=skip_locked)
+            
+            result = await db.execute(stmt)
+            row = result.one_or_none()
+            session, is_expired = row if row else (None, False)
             
-            if session and session.is_expired:
+            if session and is_expired:
                 logger.debug(f"Session for user {telegram_user_id} is expired, cleaning up")
                 await self.delete_session(db, telegram_user_id)
                 return None
@@ -64,6 +110,42 @@ class DatabaseSessionManager:
             logger.error(f"Error retrieving session for user {telegram_user_id}: {e}")
             return None
     
+    async def get_sessions_bulk(self, db: AsyncSession, 
+                                telegram_user_ids: Iterable[int]) -> Dict[int, UserSession]:
+        """
+        Get active sessions for many users in a single query.
+        
+        Unlike get_session, expired sessions are skipped rather than deleted;
+        cleanup_expired_sessions takes care of those.
+        
+        Args:
+            db: Database session
+            telegram_user_ids: Telegram user IDs
+            
+        Returns:
+            Mapping of Telegram user ID to UserSession for users with an active session
+        """
+        user_ids = set(telegram_user_ids)
+        if not user_ids:
+            return {}
+        
+        try:
+            result = await db.execute(
+                select(UserSession)
+                .where(
+                    and_(
+                        UserSession.telegram_user_id.in_(user_ids),
+                        UserSession.expires_at > func.now()
+                    )
+                )
+            )
+            
+            return {session.telegram_user_id: session for session in result.scalars()}
+            
+        except Exception as e:
+            logger.error(f"Error retrieving sessions for {len(user_ids)} users: {e}")
+            return {}
+    
     async def get_or_create_session(self, db: AsyncSession, telegram_user_id: int, 
                                    initial_step: str = "start") -> UserSession:
         """
@@ -77,17 +159,43 @@ class DatabaseSessionManager:
         Returns:
             UserSession instance (existing or newly created)
         """
-        session = await self.get_session(db, telegram_user_id)
+        insert_stmt = pg_insert(UserSession).values(
+            telegram_user_id=telegram_user_id,
+            current_step=initial_step,
+            session_data={},
+            expires_at=self._expiry_from_now(self.default_expiry_minutes)
+        )
+        excluded = insert_stmt.excluded
         
-        if session:
-            # Extend existing session
-            session.extend_session(self.default_expiry_minutes)
+        # An active session keeps its state, an expired one is reset
+        is_expired = UserSession.expires_at <= func.now()
+        
+        try:
+            # Single upsert: create, extend or reset the session in one round-trip
+            result = await db.execute(
+                insert_stmt
+                .on_conflict_do_update(
+                    index_elements=[UserSession.telegram_user_id],
+                    set_={
+                        "current_step": case((is_expired, excluded.current_step), else_=UserSession.current_step),
+                        "session_data": case((is_expired, excluded.session_data), else_=UserSession.session_data),
+                        "expires_at": excluded.expires_at,
+                        "updated_at": func.now()
+                    }
+                )
+                .returning(UserSession)
+                .execution_options(populate_existing=True)
+            )
+            session = result.scalar_one()
             await db.commit()
-            logger.debug(f"Extended existing session for user {telegram_user_id}")
+            
+            logger.debug(f"Got or created session for user {telegram_user_id}, step: {session.current_step}")
             return session
-        
-        # Create new session
-        return await self.create_session(db, telegram_user_id, initial_step)
+            
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error getting or creating session for user {telegram_user_id}: {e}")
+            raise
     
     async def create_session(self, db: AsyncSession, telegram_user_id: int, 
                            initial_step: str = "start") -> UserSession:
@@ -147,28 +255,44 @@ class DatabaseSessionManager:
         Returns:
             Updated UserSession or None if not found
         """
+        values: Dict[str, Any] = {}
+        
+        # Update step if provided
+        if current_step:
+            values["current_step"] = current_step
+        
+        # Merge session data server-side if provided
+        if session_data:
+            values["session_data"] = _merge_session_data(session_data)
+        
+        # Extend expiry if requested
+        if extend_expiry:
+            values["expires_at"] = self._expiry_from_now(self.default_expiry_minutes)
+        
+        if not values:
+            return await self.get_session(db, telegram_user_id)
+        
         try:
-            session = await self.get_session(db, telegram_user_id)
+            # Single UPDATE ... RETURNING on the active session, no prior SELECT
+            result = await db.execute(
+                update(UserSession)
+                .where(self._active_session_clause(telegram_user_id))
+                .values(**values)
+                .returning(UserSession)
+                .execution_options(populate_existing=True)
+            )
+            session = result.scalar_one_or_none()
+            await db.commit()
+            
             if not session:
                 logger.warning(f"No active session found for user {telegram_user_id}")
                 return None
             
-            # Update step if provided
             if current_step:
-                session.current_step = current_step
                 logger.debug(f"Updated session step for user {telegram_user_id}: {current_step}")
-            
-            # Update session data if provided
             if session_data:
-                for key, value in session_data.items():
-                    session.set_data(key, value)
                 logger.debug(f"Updated session data for user {telegram_user_id}: {list(session_data.keys())}")
             
-            # Extend expiry if requested
-            if extend_expiry:
-                session.extend_session(self.default_expiry_minutes)
-            
-            await db.commit()
             return session
             
         except Exception as e:
@@ -191,14 +315,15 @@ class DatabaseSessionManager:
             True if successful, False otherwise
         """
         try:
-            session = await self.get_session(db, telegram_user_id)
-            if not session:
+            updated = await self._update_active_session(
+                db,
+                telegram_user_id,
+                session_data=_set_session_data_key(key, value),
+                expires_at=self._expiry_from_now(self.default_expiry_minutes)
+            )
+            if not updated:
                 return False
             
-            session.set_data(key, value)
-            session.extend_session(self.default_expiry_minutes)
-            await db.commit()
-            
             logger.debug(f"Set session data for user {telegram_user_id}: {key}")
             return True
             
@@ -277,11 +402,10 @@ class DatabaseSessionManager:
             Number of sessions cleaned up
         """
         try:
-            current_time = datetime.now(timezone.utc)
-            
+            # Cutoff computed by the database so app clock drift cannot skew it
             result = await db.execute(
                 delete(UserSession)
-                .where(UserSession.expires_at <= current_time)
+                .where(UserSession.expires_at <= func.now())
             )
             
             await db.commit()
@@ -308,15 +432,13 @@ class DatabaseSessionManager:
             Number of active sessions
         """
         try:
-            current_time = datetime.now(timezone.utc)
-            
             result = await db.execute(
-                select(UserSession)
-                .where(UserSession.expires_at > current_time)
+                select(func.count())
+                .select_from(UserSession)
+                .where(UserSession.expires_at > func.now())
             )
             
-            sessions = result.scalars().all()
-            return len(sessions)
+            return result.scalar_one()
             
         except Exception as e:
             logger.error(f"Error getting active sessions count: {e}")
@@ -334,14 +456,12 @@ class DatabaseSessionManager:
             List of UserSession instances
         """
         try:
-            current_time = datetime.now(timezone.utc)
-            
             result = await db.execute(
                 select(UserSession)
                 .where(
                     and_(
                         UserSession.current_step == step,
-                        UserSession.expires_at > current_time
+                        UserSession.expires_at > func.now()
                     )
                 )
             )
@@ -352,6 +472,41 @@ class DatabaseSessionManager:
             logger.error(f"Error getting sessions by step '{step}': {e}")
             return []
     
+    async def stream_sessions_by_step(self, db: AsyncSession, step: str,
+                                      batch_size: int = 500) -> AsyncIterator[UserSession]:
+        """
+        Stream active sessions at a specific conversation step.
+        
+        Rows are fetched from a server-side cursor in batches, so iterating
+        over many sessions (e.g. broadcasting to a step) keeps memory bounded.
+        
+        Args:
+            db: Database session
+            step: Conversation step to filter by
+            batch_size: Number of rows fetched per round-trip
+            
+        Yields:
+            UserSession instances
+        """
+        try:
+            result = await db.stream(
+                select(UserSession)
+                .where(
+                    and_(
+                        UserSession.current_step == step,
+                        UserSession.expires_at > func.now()
+                    )
+                )
+                .execution_options(yield_per=batch_size)
+            )
+            
+            async for batch in result.scalars().partitions():
+                for session in batch:
+                    yield session
+                    
+        except Exception as e:
+            logger.error(f"Error streaming sessions by step '{step}': {e}")
+    
     async def extend_session_expiry(self, db: AsyncSession, telegram_user_id: int, 
                                    minutes: int = None) -> bool:
         """
@@ -366,13 +521,14 @@ class DatabaseSessionManager:
             True if successful, False otherwise
         """
         try:
-            session = await self.get_session(db, telegram_user_id)
-            if not session:
-                return False
-            
             extend_minutes = minutes or self.default_expiry_minutes
-            session.extend_session(extend_minutes)
-            await db.commit()
+            updated = await self._update_active_session(
+                db,
+                telegram_user_id,
+                expires_at=self._expiry_from_now(extend_minutes)
+            )
+            if not updated:
+                return False
             
             logger.debug(f"Extended session expiry for user {telegram_user_id} by {extend_minutes} minutes")
             return True
@@ -380,4 +536,60 @@ class DatabaseSessionManager:
         except Exception as e:
             await db.rollback()
             logger.error(f"Error extending session expiry for user {telegram_user_id}: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    async def _update_active_session(self, db: AsyncSession, telegram_user_id: int,
+                                     **values: Any) -> bool:
+        """
+        Update a user's active session in a single statement and commit.
+        
+        The updated row is returned into the identity map, so a UserSession
+        already loaded in this database session reflects the new values.
+        
+        Args:
+            db: Database session
+            telegram_user_id: Telegram user ID
+            **values: Column values to set
+            
+        Returns:
+            True if an active session was updated, False otherwise
+        """
+        result = await db.execute(
+            update(UserSession)
+            .where(self._active_session_clause(telegram_user_id))
+            .values(**values)
+            .returning(UserSession)
+            .execution_options(populate_existing=True)
+        )
+        updated = result.scalar_one_or_none() is not None
+        await db.commit()
+        return updated
+    
+    @staticmethod
+    def _active_session_clause(telegram_user_id: int):
+        """
+        Build the WHERE clause matching a user's unexpired session.
+        
+        Args:
+            telegram_user_id: Telegram user ID
+            
+        Returns:
+            SQL boolean expression
+        """
+        return and_(
+            UserSession.telegram_user_id == telegram_user_id,
+            UserSession.expires_at > func.now()
+        )
+    
+    @staticmethod
+    def _expiry_from_now(minutes: int) -> datetime:
+        """
+        Compute an expiry timestamp relative to the current time.
+        
+        Args:
+            minutes: Minutes until expiry
+            
+        Returns:
+            Timezone-aware expiry timestamp
+        """
+        return datetime.now(timezone.utc) + timedelta(minutes=minutes)
\ No newline at end of file
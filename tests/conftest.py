@@ -0,0 +1,16 @@
+"""
+Shared pytest setup for CourseWise tests.
+
+Settings are validated when app.config is imported, so dummy credentials
+are provided before any app module is loaded.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1234567890:" + "A" * 35)
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-0000000000")
+
+# Make the app package importable without installing the project
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,123 @@
+"""
+Tests for curriculum loading and reloading in app.utils.curriculum.
+"""
+
+import json
+import os
+
+import pytest
+
+import app.utils.curriculum as curriculum
+
+
+def write_curriculum(data_dir, entry_year, course_name, mtime_ns=None):
+    path = data_dir / f"entry_{entry_year}.json"
+    path.write_text(json.dumps({
+        "semesters": {
+            "1": {
+                "semester": 1,
+                "courses": [{
+                    "course_code": "MATH101",
+                    "course_name": course_name,
+                    "theoretical_credits": 3,
+                    "practical_credits": 0,
+                    "course_type": "foundation",
+                    "is_mandatory": True,
+                    "prerequisites": [],
+                }],
+            },
+        },
+        "graduation_requirements": {"total_credits": 140},
+    }, ensure_ascii=False), encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def write_name_mappings(path, mappings, mtime_ns):
+    path.write_text(json.dumps({"course_name_mappings": mappings}, ensure_ascii=False), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    manager = curriculum.CurriculumManager(data_dir=str(tmp_path))
+    monkeypatch.setattr(curriculum, "curriculum_manager", manager)
+    return manager
+
+
+def test_edited_file_is_picked_up_by_lookups(tmp_path, manager):
+    write_curriculum(tmp_path, 1403, "ریاضی عمومی 1", mtime_ns=1_000_000_000)
+    assert manager.get_course_info("MATH101", 1403).course_name == "ریاضی عمومی 1"
+
+    write_curriculum(tmp_path, 1403, "ریاضی پایه", mtime_ns=2_000_000_000)
+    assert manager.get_course_info("MATH101", 1403).course_name == "ریاضی پایه"
+    assert manager.find_course_by_name("ریاضی پایه", 1403).course_code == "MATH101"
+
+
+def test_reload_clears_memoized_lookups(tmp_path, manager):
+    write_curriculum(tmp_path, 1403, "ریاضی عمومی 1", mtime_ns=1_000_000_000)
+    assert curriculum.get_course_info_by_code_or_name("MATH101", 1403).course_name == "ریاضی عمومی 1"
+
+    # Reloaded through a caller unrelated to the memoized lookup
+    write_curriculum(tmp_path, 1403, "ریاضی پایه", mtime_ns=2_000_000_000)
+    manager.get_graduation_requirements(1403)
+
+    assert curriculum.get_course_info_by_code_or_name("MATH101", 1403).course_name == "ریاضی پایه"
+
+
+def test_memoized_lookup_sees_edited_file(tmp_path, manager):
+    write_curriculum(tmp_path, 1403, "ریاضی عمومی 1", mtime_ns=1_000_000_000)
+    assert curriculum.get_course_info_by_code_or_name("MATH101", 1403).course_name == "ریاضی عمومی 1"
+    assert curriculum.get_course_info_by_code_or_name("ریاضی عمومی 1", 1403).course_code == "MATH101"
+
+    write_curriculum(tmp_path, 1403, "ریاضی پایه", mtime_ns=2_000_000_000)
+
+    assert curriculum.get_course_info_by_code_or_name("MATH101", 1403).course_name == "ریاضی پایه"
+    assert curriculum.get_course_info_by_code_or_name("ریاضی عمومی 1", 1403) is None
+
+
+def test_unparseable_edit_keeps_last_good_curriculum(tmp_path, manager):
+    write_curriculum(tmp_path, 1403, "ریاضی عمومی 1", mtime_ns=1_000_000_000)
+    manager.load_curriculum(1403)
+
+    path = tmp_path / "entry_1403.json"
+    path.write_text("{", encoding="utf-8")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+
+    assert manager.get_course_info("MATH101", 1403).course_name == "ریاضی عمومی 1"
+
+
+def test_load_all_curricula_picks_up_new_files(tmp_path, manager):
+    write_curriculum(tmp_path, 1399, "ریاضی عمومی 1")
+    assert curriculum.load_all_curricula() == 1
+
+    write_curriculum(tmp_path, 1403, "ریاضی پایه")
+    assert curriculum.load_all_curricula() == 2
+    assert manager.get_available_years() == [1399, 1403]
+    assert manager.get_course_info("MATH101", 1403).course_name == "ریاضی پایه"
+
+
+def test_name_lookup_recovers_after_mappings_file_is_fixed(tmp_path, monkeypatch):
+    mappings_path = tmp_path / "course_name_mappings.json"
+    mappings_path.write_text("{", encoding="utf-8")
+    monkeypatch.setattr(curriculum, "_NAME_MAPPINGS_PATH", mappings_path)
+    monkeypatch.setattr(curriculum, "_name_mapping_state", None)
+
+    assert curriculum.get_course_code_by_name("ریاضی عمومی 1") is None
+
+    write_name_mappings(mappings_path, {"ریاضی عمومی 1": "MATH101"}, mtime_ns=1_000_000_000)
+
+    assert curriculum.get_course_code_by_name("ریاضی عمومی 1") == "MATH101"
+
+
+def test_name_lookup_sees_edited_mappings_file(tmp_path, monkeypatch):
+    mappings_path = tmp_path / "course_name_mappings.json"
+    write_name_mappings(mappings_path, {"ریاضی عمومی 1": "MATH101"}, mtime_ns=1_000_000_000)
+    monkeypatch.setattr(curriculum, "_NAME_MAPPINGS_PATH", mappings_path)
+    monkeypatch.setattr(curriculum, "_name_mapping_state", None)
+
+    assert curriculum.get_course_code_by_name("ریاضی عمومی 1") == "MATH101"
+
+    write_name_mappings(mappings_path, {"ریاضی عمومی 1": "MATH111"}, mtime_ns=2_000_000_000)
+
+    assert curriculum.get_course_code_by_name("ریاضی عمومی 1") == "MATH111"
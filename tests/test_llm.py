@@ -0,0 +1,57 @@
+"""
+Tests for the structured-output schema sent with recommendation requests.
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from app.services.llm import RECOMMENDATION_RESPONSE_FORMAT, RecommendationResponse
+
+
+def schema_of(definition):
+    schema = RECOMMENDATION_RESPONSE_FORMAT["json_schema"]["schema"]
+    return schema if definition is None else schema["$defs"][definition]
+
+
+def test_schema_constrains_enumerated_values():
+    mapped_grade = schema_of("MappedGrade")["properties"]
+    recommended_course = schema_of("RecommendedCourse")["properties"]
+
+    assert mapped_grade["status"]["enum"] == ["قبول", "مردود"]
+    assert recommended_course["type"]["enum"] == ["تخصصی", "عمومی", "اختیاری"]
+    assert recommended_course["priority"]["enum"] == ["بالا", "متوسط", "پایین"]
+
+
+def test_schema_describes_free_text_fields():
+    properties = schema_of(None)["properties"]
+
+    assert properties["total_credits"]["description"]
+    assert properties["analysis"]["description"]
+
+
+def test_schema_is_valid_for_strict_mode():
+    assert RECOMMENDATION_RESPONSE_FORMAT["json_schema"]["strict"] is True
+
+    for definition in (None, "MappedGrade", "RecommendedCourse", "RecommendedCourseCredits"):
+        schema = schema_of(definition)
+        assert schema["additionalProperties"] is False
+        assert sorted(schema["required"]) == sorted(schema["properties"])
+
+
+def test_response_rejects_values_outside_enums():
+    payload = {
+        "mapped_grades": [],
+        "recommended_courses": [{
+            "course_code": "CS101",
+            "course_name": "مبانی کامپیوتر",
+            "credits": {"theoretical": 3, "practical": 0},
+            "type": "تخصصی",
+            "priority": "فوری",
+            "reason": "پیش‌نیاز دروس بعدی",
+        }],
+        "total_credits": "3",
+        "analysis": "",
+    }
+
+    with pytest.raises(ValidationError):
+        RecommendationResponse.model_validate(payload)
@@ -0,0 +1,119 @@
+"""
+Tests for the recommendation prompt layout and service structure.
+
+The provider's prompt cache only reuses a byte-identical prefix, so every
+per-student value must come after STUDENT_BLOCK_HEADER.
+"""
+
+import ast
+import asyncio
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+import app.services.simple_recommendation as simple_recommendation
+from app.services.simple_recommendation import STUDENT_BLOCK_HEADER, SimpleRecommendationService
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def service(monkeypatch):
+    # Data files are resolved relative to the working directory
+    monkeypatch.chdir(REPO_ROOT)
+    return SimpleRecommendationService()
+
+
+def build_prompt(service, entry_year, current_semester, raw_grades, last_semester_gpa, overall_gpa):
+    async def load():
+        return await asyncio.gather(
+            service._load_curriculum(entry_year),
+            service._load_offerings("mehr_1404", entry_year, current_semester),
+        )
+
+    curriculum, offerings = asyncio.run(load())
+    return service._create_recommendation_prompt(
+        entry_year=entry_year,
+        current_semester=current_semester,
+        raw_grades=raw_grades,
+        last_semester_gpa=last_semester_gpa,
+        overall_gpa=overall_gpa,
+        curriculum=curriculum,
+        offerings=offerings,
+        credit_limit=service._get_credit_limit(overall_gpa),
+    )
+
+
+def split_at_student_block(prompt):
+    prefix, header, student_block = prompt.rpartition(STUDENT_BLOCK_HEADER)
+    assert header, "prompt has no student block"
+    return prefix, student_block
+
+
+def test_students_in_same_cohort_share_prompt_prefix(service):
+    first = build_prompt(service, 1403, 3, "برنامه‌سازی پیشرفته: 18\nریاضی 2: 9", 11.5, 11.8)
+    second = build_prompt(service, 1403, 3, "فیزیک 1: 15", 17.9, 18.2)
+
+    first_prefix, first_student = split_at_student_block(first)
+    second_prefix, second_student = split_at_student_block(second)
+
+    assert first_prefix == second_prefix
+    assert first_student != second_student
+
+
+def test_student_values_only_appear_in_trailing_block(service):
+    raw_grades = "ساختمان داده: 13.25"
+    prompt = build_prompt(service, 1401, 5, raw_grades, 13.75, 14.25)
+    prefix, student_block = split_at_student_block(prompt)
+
+    for value in (raw_grades, "13.75", "14.25", service._get_credit_limit(14.25)):
+        assert value not in prefix
+        assert value in student_block
+
+
+def test_rubric_is_identical_across_cohorts(service):
+    first = build_prompt(service, 1403, 1, "ریاضی 1: 16", 16.0, 16.0)
+    second = build_prompt(service, 1399, 7, "هوش مصنوعی: 12", 12.5, 13.0)
+
+    curriculum_marker = "چارت درسی:\n"
+    assert first.split(curriculum_marker, 1)[0] == second.split(curriculum_marker, 1)[0]
+
+
+def test_warm_loads_do_no_file_io(service, monkeypatch):
+    build_prompt(service, 1403, 3, "ریاضی 1: 16", 16.0, 16.0)
+    build_prompt(service, 1399, 7, "ریاضی 1: 16", 16.0, 16.0)
+
+    class NoFileIO:
+        def __init__(self, *args, **kwargs):
+            raise AssertionError("file I/O on a warm cache")
+
+    monkeypatch.setattr(simple_recommendation.anyio, "Path", NoFileIO)
+
+    prompt = build_prompt(service, 1403, 3, "فیزیک 1: 15", 17.0, 17.0)
+    assert "در دسترس نیست" not in prompt
+
+    offered = next(
+        course
+        for semester in simple_recommendation._offerings_cache["mehr_1404"].raw["entry_year_groups"]["1403"]["semesters"].values()
+        for course in semester["courses"]
+    )
+    enriched = asyncio.run(service._enrich_courses_with_offerings(
+        {"courses": [{"course_code": offered["course_code"], "course_name": "?"}]}, "mehr_1404"
+    ))
+    assert enriched["courses"][0]["course_name"] == offered["course_name"]
+
+
+def test_no_class_defines_a_method_twice():
+    # A later definition silently replaces an earlier one with the same name
+    tree = ast.parse(Path(simple_recommendation.__file__).read_text(encoding="utf-8"))
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            names = Counter(
+                item.name
+                for item in node.body
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+            )
+            duplicates = sorted(name for name, count in names.items() if count > 1)
+            assert not duplicates, f"{node.name} redefines {duplicates}"
@@ -0,0 +1,176 @@
+"""
+Tests for StudentAnalyzer GPA, credit and standing calculations.
+"""
+
+import asyncio
+import importlib
+import sys
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+import app.models.student as student_models
+import app.services as services_package
+
+ANALYZER_MODULE = "app.services.student_analyzer"
+
+
+@pytest.fixture
+def analyzer_class(monkeypatch):
+    """
+    Import StudentAnalyzer against a placeholder grade model.
+
+    The analyzer references StudentGrade at import time only; these tests
+    feed plain grade objects instead of ORM rows. The placeholder and the
+    module imported against it are both dropped again after the test.
+    """
+    monkeypatch.setattr(student_models, "StudentGrade", type("StudentGrade", (), {}), raising=False)
+    monkeypatch.delitem(sys.modules, ANALYZER_MODULE, raising=False)
+    monkeypatch.delattr(services_package, "student_analyzer", raising=False)
+
+    yield importlib.import_module(ANALYZER_MODULE).StudentAnalyzer
+
+    sys.modules.pop(ANALYZER_MODULE, None)
+    if hasattr(services_package, "student_analyzer"):
+        delattr(services_package, "student_analyzer")
+
+
+@pytest.fixture
+def analyze(analyzer_class):
+    def run(grades, student_id=1, cache_key=None):
+        """Run analyze_student_status on an in-memory student, bypassing the database"""
+        analyzer = analyzer_class()
+        student = SimpleNamespace(
+            id=student_id,
+            entry_year=1402,
+            current_semester=4,
+            student_number="40212345",
+            grades=grades,
+        )
+
+        async def get_student_with_grades(db, requested_id):
+            return student
+
+        async def get_status_cache_key(db, requested_id):
+            return cache_key
+
+        analyzer._get_student_with_grades = get_student_with_grades
+        analyzer._get_status_cache_key = get_status_cache_key
+        return asyncio.run(analyzer.analyze_student_status(student_id, db=object()))
+
+    return run
+
+
+def make_grade(course_code, grade, status, attempt_number=1, credits=3):
+    course = SimpleNamespace(
+        course_code=course_code,
+        course_name=course_code,
+        theoretical_credits=credits,
+        practical_credits=0,
+        course_type="core",
+    )
+    return SimpleNamespace(
+        course=course,
+        grade=None if grade is None else Decimal(str(grade)),
+        status=status,
+        attempt_number=attempt_number,
+        created_at=None,
+        updated_at=None,
+    )
+
+
+def test_statuses_written_by_grade_handler_are_counted(analyze):
+    # The grade handler stores "passed", "failed" and "withdrawn"
+    status = analyze([
+        make_grade("MATH101", 15, "passed"),
+        make_grade("PHYS101", 12, "passed"),
+        make_grade("CS101", 8, "failed"),
+        make_grade("ENG101", 18, "withdrawn"),
+    ])
+
+    assert status.current_gpa == round((15 * 3 + 12 * 3 + 8 * 3) / 9, 2)
+    assert status.total_credits_passed == 6
+    assert status.academic_standing == "probation"  # GPA below 12
+    assert [course["course_code"] for course in status.failed_courses] == ["CS101"]
+    assert sorted(course["course_code"] for course in status.completed_courses) == ["MATH101", "PHYS101"]
+
+
+def test_passed_grades_give_normal_standing(analyze):
+    status = analyze([
+        make_grade("MATH101", 14, "passed"),
+        make_grade("PHYS101", 13, "passed"),
+    ])
+
+    assert status.current_gpa == 13.5
+    assert status.total_credits_passed == 6
+    assert status.academic_standing == "normal"
+
+
+def test_only_latest_attempt_of_each_course_counts(analyze):
+    status = analyze([
+        make_grade("MATH101", 7, "failed", attempt_number=1),
+        make_grade("MATH101", 16, "passed", attempt_number=2),
+        make_grade("PHYS101", 14, "confirmed"),
+    ])
+
+    assert status.current_gpa == 15.0
+    assert status.total_credits_passed == 6
+    assert status.failed_courses == []
+
+
+def test_withdrawn_and_ungraded_attempts_are_ignored(analyze):
+    status = analyze([
+        make_grade("MATH101", 14, "passed", attempt_number=1),
+        make_grade("MATH101", None, "failed", attempt_number=2),
+        make_grade("CS101", 19, "withdrawn"),
+    ])
+
+    assert status.current_gpa == 14.0
+    assert status.total_credits_passed == 3
+    assert [course["course_code"] for course in status.completed_courses] == ["MATH101"]
+
+
+def test_cached_status_is_not_shared_with_callers(analyze):
+    grades = [
+        make_grade("MATH101", 15, "passed"),
+        make_grade("CS101", 8, "failed"),
+    ]
+    cache_key = ("test_cached_status_is_not_shared_with_callers",)
+
+    first = analyze(grades, cache_key=cache_key)
+    first.completed_courses.append({"course_code": "EXTRA"})
+    first.prerequisite_status["EXTRA"] = True
+
+    second = analyze(grades, cache_key=cache_key)
+    second.failed_courses.clear()
+
+    third = analyze(grades, cache_key=cache_key)
+    assert [course["course_code"] for course in third.completed_courses] == ["MATH101"]
+    assert "EXTRA" not in third.prerequisite_status
+    assert [course["course_code"] for course in third.failed_courses] == ["CS101"]
+
+
+def test_superseded_failed_attempts_do_not_cause_probation(analyze):
+    grades = []
+    for course_code in ("MATH101", "PHYS101", "CS101"):
+        grades.append(make_grade(course_code, 6, "failed", attempt_number=1))
+        grades.append(make_grade(course_code, 19, "passed", attempt_number=2))
+
+    status = analyze(grades)
+
+    assert status.current_gpa == 19.0
+    assert status.failed_courses == []
+    assert status.academic_standing == "excellent"
+
+
+def test_three_current_failures_cause_probation(analyze):
+    status = analyze([
+        make_grade("MATH101", 9, "failed"),
+        make_grade("PHYS101", 9, "failed"),
+        make_grade("CS101", 9, "failed"),
+        make_grade("ENG101", 20, "passed", credits=20),
+    ])
+
+    assert status.current_gpa >= 12.0
+    assert status.academic_standing == "probation"